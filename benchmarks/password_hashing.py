@@ -0,0 +1,79 @@
+"""
+Login throughput against event loop latency, with bcrypt run inline on the
+event loop versus offloaded to the password worker pool.
+
+Run from the repository root (the usual .env is required):
+
+    python -m benchmarks.password_hashing --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+from internal.utils.passwords import PasswordHasher
+
+TICK_INTERVAL = 0.01
+
+
+async def measure_loop_lag(samples: List[float], stop: asyncio.Event):
+    # A healthy loop wakes the ticker on time, any overshoot is time spent blocked
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        samples.append(time.perf_counter() - started - TICK_INTERVAL)
+
+
+async def run(mode: str, hasher: PasswordHasher, hashed: str, logins: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            if mode == "inline":
+                hasher.verify_sync("password", hashed)
+            else:
+                await hasher.verify("password", hashed)
+
+    ticker = asyncio.create_task(measure_loop_lag(lag_samples, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    lag_samples.sort()
+    return {
+        "logins_per_second": logins / elapsed,
+        "lag_p50_ms": statistics.median(lag_samples) * 1000 if lag_samples else 0.0,
+        "lag_p99_ms": lag_samples[int(len(lag_samples) * 0.99)] * 1000 if lag_samples else 0.0,
+        "lag_max_ms": lag_samples[-1] * 1000 if lag_samples else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers)
+    hashed = hasher.hash_sync("password")
+
+    print(f"bcrypt rounds={args.rounds} workers={args.workers} logins={args.logins} concurrency={args.concurrency}")
+    print(f"{'mode':<8}{'logins/s':>12}{'lag p50':>12}{'lag p99':>12}{'lag max':>12}")
+    for mode in ("inline", "pool"):
+        result = asyncio.run(run(mode, hasher, hashed, args.logins, args.concurrency))
+        print(
+            f"{mode:<8}{result['logins_per_second']:>12.1f}"
+            f"{result['lag_p50_ms']:>10.1f}ms{result['lag_p99_ms']:>10.1f}ms{result['lag_max_ms']:>10.1f}ms"
+        )
+
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
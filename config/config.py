@@ -48,6 +48,36 @@ if missing_keys:
 conf.update(required_envs)
 conf["email_port"] = int(conf["email_port"])
 
+# Outbound Email Configuration
+conf["email_workers"] = int(os.environ.get("EMAIL_WORKERS", "2"))
+conf["email_queue_size"] = int(os.environ.get("EMAIL_QUEUE_SIZE", "1000"))
+conf["email_max_retries"] = int(os.environ.get("EMAIL_MAX_RETRIES", "3"))
+conf["email_timeout"] = float(os.environ.get("EMAIL_TIMEOUT", "10"))
+conf["email_keepalive_seconds"] = float(os.environ.get("EMAIL_KEEPALIVE_SECONDS", "60"))
+
+# Google Books Configuration
+conf["google_books_api_url"] = os.environ.get("GOOGLE_BOOKS_API_URL", "https://www.googleapis.com/books/v1/volumes")
+conf["google_books_timeout"] = float(os.environ.get("GOOGLE_BOOKS_TIMEOUT", "10"))
+conf["google_books_max_connections"] = int(os.environ.get("GOOGLE_BOOKS_MAX_CONNECTIONS", "8"))
+conf["google_books_cache_ttl"] = int(os.environ.get("GOOGLE_BOOKS_CACHE_TTL", str(7 * 24 * 3600)))
+conf["google_books_negative_cache_ttl"] = int(os.environ.get("GOOGLE_BOOKS_NEGATIVE_CACHE_TTL", "3600"))
+
+# Bulk Import Configuration
+conf["book_import_concurrency"] = int(os.environ.get("BOOK_IMPORT_CONCURRENCY", "4"))
+conf["book_import_requests_per_second"] = float(os.environ.get("BOOK_IMPORT_REQUESTS_PER_SECOND", "5"))
+conf["book_import_batch_size"] = int(os.environ.get("BOOK_IMPORT_BATCH_SIZE", "50"))
+
+# Authentication Cache Configuration
+conf["auth_cache_ttl"] = float(os.environ.get("AUTH_CACHE_TTL", "30"))
+conf["auth_cache_size"] = int(os.environ.get("AUTH_CACHE_SIZE", "10000"))
+
+# Password Hashing Configuration
+conf["bcrypt_rounds"] = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+conf["password_workers"] = int(os.environ.get("PASSWORD_WORKERS", "4"))
+
+# Borrow Event Configuration
+conf["borrow_event_retention_days"] = int(os.environ.get("BORROW_EVENT_RETENTION_DAYS", "365"))
+
 # MongoDB Configuration
 conf["mongodb_user"] = os.getenv("MONGODB_USERNAME")
 conf["mongodb_pass"] = os.getenv("MONGODB_PASSWORD")
@@ -5,7 +5,9 @@ from internal.models.admin import Admin, PublicAdmin
 from internal.types.responses import PublicAdminResponse, FailResponse
 from internal.types.types import AdminUpdateRequest, SUCCESS, FAIL, AdminRequest
 from internal.database.users import get_user_by_username, get_user_by_email
-from internal.utils.utils import hash_password, get_current_admin
+from internal.utils.utils import get_current_admin, get_current_admin_principal
+from internal.utils.passwords import hash_password, verify_password
+from internal.models.principal import Principal
 from internal.database.admins import (
     get_admin_by_id, update_admin, create_admin,
     get_admin_by_email, get_admin_by_username
@@ -29,8 +31,8 @@ async def get_current_admin_info(admin: Admin = Depends(get_current_admin)):
 
 
 @router.patch("/me", response_model=PublicAdminResponse)
-async def update_admin_info(update_data: AdminUpdateRequest, admin: Admin = Depends(get_current_admin)):
-    admin = await get_admin_by_id(admin.id)
+async def update_admin_info(update_data: AdminUpdateRequest, principal: Principal = Depends(get_current_admin_principal)):
+    admin = await get_admin_by_id(principal.id)
     if not admin:
         return JSONResponse(status_code=404, content=jsonable_encoder(
             FailResponse(
@@ -46,8 +48,8 @@ async def update_admin_info(update_data: AdminUpdateRequest, admin: Admin = Depe
     if update_data.email and update_data.email != admin.email:
         admin.email = update_data.email
         is_updated = True
-    if update_data.password and not admin.check_password(update_data.password):
-        admin.password = hash_password(update_data.password)
+    if update_data.password and not await verify_password(update_data.password, admin.password):
+        admin.password = await hash_password(update_data.password)
         is_updated = True
 
     if is_updated:
@@ -77,7 +79,7 @@ async def register_admin(
     request_body: AdminRequest,
     request: Request,
     response: Response,
-    admin: Admin = Depends(get_current_admin)
+    principal: Principal = Depends(get_current_admin_principal)
 ):
     existing_admin_email = await get_admin_by_email(request_body.email)
     if existing_admin_email:
@@ -122,7 +124,7 @@ async def register_admin(
     admin = Admin(
         username=request_body.username,
         email=request_body.email,
-        password=hash_password(request_body.password),
+        password=await hash_password(request_body.password),
         role="admin"
     )
 
@@ -1,11 +1,10 @@
 from fastapi import APIRouter, Depends, Path
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from internal.database.books import get_book_by_isbn, get_book_by_id, delete_book_by_id, remove_book_from_notify_lists
-from internal.database.users import get_all_users, update_user
-from internal.utils.utils import get_current_admin
+from internal.database.books import get_book_by_isbn, get_book_by_id, delete_book_by_id, remove_book_references
+from internal.utils.utils import get_current_admin_principal
 from internal.types.types import SUCCESS, FAIL
-from internal.database.books import create_book, update_book
+from internal.database.books import create_book, save_book
 from internal.models.book import Book, BookCreate, BookEdit, BookCategory
 from internal.types.responses import SuccessResponse, FailResponse, BookResponse
 
@@ -13,7 +12,7 @@ router = APIRouter(prefix="/admin")
 
 
 @router.get("/book/{book_id}", response_model=BookResponse)
-async def get_book_details(book_id: str, admin=Depends(get_current_admin)):
+async def get_book_details(book_id: str, admin=Depends(get_current_admin_principal)):
     book = await get_book_by_id(book_id)
     if not book:
         return JSONResponse(
@@ -29,7 +28,7 @@ async def get_book_details(book_id: str, admin=Depends(get_current_admin)):
 
 
 @router.post("/book", response_model=SuccessResponse)
-async def add_book(book_data: BookCreate, admin=Depends(get_current_admin)):
+async def add_book(book_data: BookCreate, admin=Depends(get_current_admin_principal)):
     if not book_data.authors or len(book_data.authors) == 0:
         return JSONResponse(
             status_code=400,
@@ -63,7 +62,7 @@ async def add_book(book_data: BookCreate, admin=Depends(get_current_admin)):
 
 
 @router.patch("/book/{book_id}", response_model=SuccessResponse)
-async def patch_book(book_id: str, book_data: BookEdit, admin=Depends(get_current_admin)):
+async def patch_book(book_id: str, book_data: BookEdit, admin=Depends(get_current_admin_principal)):
     book = await get_book_by_id(book_id)
     if not book:
         return JSONResponse(
@@ -87,7 +86,7 @@ async def patch_book(book_id: str, book_data: BookEdit, admin=Depends(get_curren
             value = [BookCategory(**v) if isinstance(v, dict) else v for v in value]
         setattr(book, key, value)
 
-    saved = await update_book(book)
+    saved = await save_book(book)
     if not saved:
         return JSONResponse(
             status_code=500,
@@ -98,7 +97,7 @@ async def patch_book(book_id: str, book_data: BookEdit, admin=Depends(get_curren
 
 
 @router.delete("/book/{book_id}", response_model=SuccessResponse)
-async def delete_book(book_id: str = Path(...), admin=Depends(get_current_admin)):
+async def delete_book(book_id: str = Path(...), admin=Depends(get_current_admin_principal)):
     book = await get_book_by_id(book_id)
     if not book:
         return JSONResponse(
@@ -106,36 +105,6 @@ async def delete_book(book_id: str = Path(...), admin=Depends(get_current_admin)
             content=jsonable_encoder(FailResponse(code=FAIL, message="Book not found"))
         )
 
-    # Remove book references from all users
-    users = await get_all_users()
-    for user in users:
-        modified = False
-
-        if book_id in (user.borrowed_books or []):
-            user.borrowed_books.remove(book_id)
-            modified = True
-
-        if book_id in (user.overdue_books or []):
-            user.overdue_books.remove(book_id)
-            modified = True
-
-        if book_id in (user.borrowed_history or []):
-            user.borrowed_history.remove(book_id)
-            modified = True
-
-        if user.penalties:
-            new_penalties = [p for p in user.penalties if p.book_id != book_id]
-            if len(new_penalties) != len(user.penalties):
-                user.penalties = new_penalties
-                modified = True
-
-        if book_id in (user.notify_me_list or []):
-            user.notify_me_list.remove(book_id)
-            modified = True
-
-        if modified:
-            await update_user(user)
-
     # Remove book from book collection
     deleted = await delete_book_by_id(book_id)
     if not deleted:
@@ -144,8 +113,8 @@ async def delete_book(book_id: str = Path(...), admin=Depends(get_current_admin)
             content=jsonable_encoder(FailResponse(code=FAIL, message="Failed to delete book"))
         )
 
-    # Clean up notify lists for safety
-    await remove_book_from_notify_lists(book_id)
+    # Remove book references from all users
+    await remove_book_references([book_id])
 
     return SuccessResponse(
         code=SUCCESS,
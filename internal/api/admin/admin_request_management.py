@@ -1,79 +1,139 @@
 from fastapi import APIRouter, Depends, Body, Query, Path
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from rapidfuzz import fuzz
 from internal.database.books import create_book
-from internal.models.request import RequestStatus, BookRequestPreview, RequesterInfo, RequestDetails
-from internal.utils.utils import get_current_admin
+from internal.models.request import RequestStatus, BookRequest, BookRequestPreview, RequesterInfo, RequestDetails
+from internal.utils.utils import get_current_admin_principal
 from internal.types.types import SUCCESS, FAIL
 from internal.types.responses import (
     FailResponse, SuccessResponse,
-    BookRequestPreviewListResponse, BookRequestDetailsResponse,
+    BookRequestPreviewListResponse, BookRequestDetailsResponse, AcquisitionQueueResponse,
 )
-from internal.database.users import (
-    get_all_users,
-    update_request_status_for_all,
-    delete_request_from_all_users,
+from internal.database.users import get_users_by_ids
+from internal.database.acquisitions import get_acquisition_items, count_acquisition_items
+from internal.database.requests import (
+    OPEN_REQUESTS_QUERY,
+    get_request_by_id, get_requests, get_requests_by_ids, count_requests, get_request_candidates,
+    get_first_requester_ids, get_requester_ids, update_request_status as set_request_status,
+    delete_request as remove_request,
 )
 
 router = APIRouter(prefix="/admin")
 
 
+async def build_request_previews(requests: List[BookRequest]) -> List[BookRequestPreview]:
+    # Each request is shown with the user who asked for it first
+    first_requesters = await get_first_requester_ids([req.id for req in requests])
+    users = await get_users_by_ids(list(set(first_requesters.values())))
+
+    previews = []
+    for req in requests:
+        user_id = first_requesters.get(req.id, "")
+        user: Dict[str, Any] = users.get(user_id, {})
+        previews.append(BookRequestPreview(
+            user_id=user_id,
+            username=user.get("username", ""),
+            email=user.get("email", ""),
+            id=req.id,
+            title=req.title,
+            authors=req.authors,
+            isbn=req.isbn,
+            publisher=req.publisher,
+            cover_image=req.cover_image,
+            status=req.status,
+            requested_at=req.requested_at,
+            status_updated_at=req.status_updated_at
+        ))
+    return previews
+
+
+async def list_request_page(
+    query: Dict[str, Any], page: Optional[int], limit: Optional[int], message: str
+) -> BookRequestPreviewListResponse:
+    total = await count_requests(query)
+    if page is None and limit is None:
+        # Callers that don't ask for a page still get every request in one response
+        requests = await get_requests(query)
+        return BookRequestPreviewListResponse(
+            code=SUCCESS,
+            message=message,
+            requests=await build_request_previews(requests),
+            total=total,
+            page=1,
+            has_next=False,
+            last_page=1
+        )
+
+    page, limit = page or 1, limit or 25
+    last_page = (total + limit - 1) // limit
+    page = min(page, last_page) if last_page else 1
+    start, end = (page - 1) * limit, (page * limit)
+
+    requests = await get_requests(query, skip=start, limit=limit)
+    return BookRequestPreviewListResponse(
+        code=SUCCESS,
+        message=message,
+        requests=await build_request_previews(requests),
+        total=total,
+        page=page,
+        has_next=end < total and page < last_page,
+        last_page=last_page
+    )
+
+
 @router.get("/requested-books", response_model=BookRequestPreviewListResponse)
 async def list_requested_books(
     page: int = Query(1, ge=1),
     limit: int = Query(25, ge=1, le=100),
     q: Optional[str] = Query(None, min_length=1),
-    admin=Depends(get_current_admin)
+    admin=Depends(get_current_admin_principal)
 ):
-    users = await get_all_users()
-    previews: List[BookRequestPreview] = []
-    seen_ids = set()
-
-    for u in users:
-        for req in (u.requested_books or []):
-            if req.id in seen_ids:
-                continue
-            seen_ids.add(req.id)
-
-            if req.status in ("Added", "Denied"):
-                continue  # Filter out here
-
-            previews.append(
-                BookRequestPreview(
-                    user_id=u.id,
-                    username=u.username,
-                    email=u.email,
-                    id=req.id,
-                    title=req.title,
-                    authors=req.authors,
-                    isbn=req.isbn,
-                    publisher=req.publisher,
-                    cover_image=req.cover_image,
-                    status=req.status,
-                    requested_at=req.requested_at,
-                    status_updated_at=req.status_updated_at
-                )
-            )
-
-    if q:
-        q_lower = q.lower()
-        previews = [
-            p for p in previews
-            if fuzz.partial_ratio(q_lower, (p.title or "").lower()) >= 60
-            or (p.isbn and q_lower in p.isbn.lower())
-        ]
-
-    total = len(previews)
+    if not q:
+        return await list_request_page(OPEN_REQUESTS_QUERY, page, limit, "Requested books retrieved")
+
+    # Fuzzy matching only needs titles and ISBNs, full documents are loaded for the page
+    q_lower = q.lower()
+    matched_ids = [
+        doc["_id"] for doc in await get_request_candidates(OPEN_REQUESTS_QUERY)
+        if fuzz.partial_ratio(q_lower, (doc.get("title") or "").lower()) >= 60
+        or (doc.get("isbn") and q_lower in doc["isbn"].lower())
+    ]
+
+    total = len(matched_ids)
     last_page = (total + limit - 1) // limit
     page = min(page, last_page) if last_page else 1
     start, end = (page - 1) * limit, (page * limit)
 
+    requests = await get_requests_by_ids(matched_ids[start:end])
     return BookRequestPreviewListResponse(
         code=SUCCESS,
         message="Requested books retrieved",
-        requests=previews[start:end],
+        requests=await build_request_previews(requests),
+        total=total,
+        page=page,
+        has_next=end < total and page < last_page,
+        last_page=last_page
+    )
+
+
+@router.get("/requested-books/acquisition", response_model=AcquisitionQueueResponse)
+async def list_acquisition_queue(
+    page: int = Query(1, ge=1),
+    limit: int = Query(25, ge=1, le=100),
+    admin=Depends(get_current_admin_principal)
+):
+    # Titles are grouped by ISBN or normalized title and ranked by requester count, then age
+    total = await count_acquisition_items()
+    last_page = (total + limit - 1) // limit
+    page = min(page, last_page) if last_page else 1
+    start, end = (page - 1) * limit, (page * limit)
+
+    return AcquisitionQueueResponse(
+        code=SUCCESS,
+        message="Acquisition queue retrieved",
+        items=await get_acquisition_items(skip=start, limit=limit),
         total=total,
         page=page,
         has_next=end < total and page < last_page,
@@ -85,7 +145,7 @@ async def list_requested_books(
 async def update_request_status(
     request_id: str = Path(...),
     status: str = Body(..., embed=True, min_length=1),
-    admin=Depends(get_current_admin)
+    admin=Depends(get_current_admin_principal)
 ):
     try:
         new_status = RequestStatus(status)
@@ -95,7 +155,7 @@ async def update_request_status(
             content=jsonable_encoder(FailResponse(code=FAIL, message="Invalid status value"))
         )
 
-    ok = await update_request_status_for_all(request_id, new_status)
+    ok = await set_request_status(request_id, new_status)
     if not ok:
         return JSONResponse(
             status_code=404,
@@ -108,9 +168,9 @@ async def update_request_status(
 @router.delete("/requested-books/{request_id}", response_model=SuccessResponse)
 async def delete_request(
     request_id: str = Path(...),
-    admin=Depends(get_current_admin)
+    admin=Depends(get_current_admin_principal)
 ):
-    ok = await delete_request_from_all_users(request_id)
+    ok = await remove_request(request_id)
     if not ok:
         return JSONResponse(
             status_code=404,
@@ -123,10 +183,10 @@ async def delete_request(
 @router.post("/add-book", response_model=SuccessResponse)
 async def add_book_from_request(
     request_id: str = Body(..., embed=True),
-    admin=Depends(get_current_admin)
+    admin=Depends(get_current_admin_principal)
 ):
     from internal.utils.google_books import fetch_google_book
-    book_obj = fetch_google_book(request_id)
+    book_obj = await fetch_google_book(request_id)
 
     if not book_obj:
         return JSONResponse(
@@ -144,13 +204,13 @@ async def add_book_from_request(
             ))
         )
 
-    updated = await update_request_status_for_all(request_id, RequestStatus.ADDED)
+    updated = await set_request_status(request_id, RequestStatus.ADDED)
     if not updated:
         return JSONResponse(
             status_code=500,
             content=jsonable_encoder(FailResponse(
                 code=FAIL,
-                message="Book saved but request status not updated for everyone"
+                message="Book saved but request status not updated"
             ))
         )
 
@@ -163,115 +223,54 @@ async def add_book_from_request(
 @router.get("/requested-books/info/{request_id}", response_model=BookRequestDetailsResponse)
 async def get_request_info(
     request_id: str = Path(...),
-    admin=Depends(get_current_admin)
+    admin=Depends(get_current_admin_principal)
 ):
-    users = await get_all_users()
-    matched_users = []
-    request_data = None
-
-    for user in users:
-        for req in user.requested_books or []:
-            if req.id == request_id:
-                if not request_data:
-                    request_data = RequestDetails(
-                        id=req.id,
-                        title=req.title,
-                        authors=req.authors,
-                        isbn=req.isbn,
-                        publisher=req.publisher,
-                        cover_image=req.cover_image,
-                        status=req.status,
-                        requested_at=req.requested_at,
-                        status_updated_at=req.status_updated_at
-                    )
-                matched_users.append(RequesterInfo(
-                    id=user.id,
-                    username=user.username,
-                    email=user.email
-                ))
-
-    if not request_data:
+    req = await get_request_by_id(request_id)
+    if not req:
         return JSONResponse(
             status_code=404,
             content=jsonable_encoder(FailResponse(code=FAIL, message="Request not found"))
         )
 
+    requester_ids = await get_requester_ids(request_id)
+    users = await get_users_by_ids(requester_ids)
+    matched_users = [
+        RequesterInfo(id=user_id, username=users[user_id]["username"], email=users[user_id]["email"])
+        for user_id in requester_ids if user_id in users
+    ]
+
     return BookRequestDetailsResponse(
         code=SUCCESS,
         message="Request info retrieved",
-        request=request_data,
+        request=RequestDetails(
+            id=req.id,
+            title=req.title,
+            authors=req.authors,
+            isbn=req.isbn,
+            publisher=req.publisher,
+            cover_image=req.cover_image,
+            status=req.status,
+            requested_at=req.requested_at,
+            status_updated_at=req.status_updated_at
+        ),
         requester_count=len(matched_users),
         requesters=matched_users
     )
 
 
 @router.get("/requested-books/added", response_model=BookRequestPreviewListResponse)
-async def list_added_requests(admin=Depends(get_current_admin)):
-    users = await get_all_users()
-    seen_ids = set()
-    previews: List[BookRequestPreview] = []
-
-    for u in users:
-        for req in u.requested_books or []:
-            if req.status == RequestStatus.ADDED and req.id not in seen_ids:
-                seen_ids.add(req.id)
-                previews.append(BookRequestPreview(
-                    user_id=u.id,
-                    username=u.username,
-                    email=u.email,
-                    id=req.id,
-                    title=req.title,
-                    authors=req.authors,
-                    isbn=req.isbn,
-                    publisher=req.publisher,
-                    cover_image=req.cover_image,
-                    status=req.status,
-                    requested_at=req.requested_at,
-                    status_updated_at=req.status_updated_at
-                ))
-
-    return BookRequestPreviewListResponse(
-        code=SUCCESS,
-        message="Added requests retrieved",
-        requests=previews,
-        total=len(previews),
-        page=1,
-        has_next=False,
-        last_page=1
-    )
+async def list_added_requests(
+    page: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    admin=Depends(get_current_admin_principal)
+):
+    return await list_request_page({"status": RequestStatus.ADDED.value}, page, limit, "Added requests retrieved")
 
 
 @router.get("/requested-books/denied", response_model=BookRequestPreviewListResponse)
-async def list_denied_requests(admin=Depends(get_current_admin)):
-    users = await get_all_users()
-    seen_ids = set()
-    previews: List[BookRequestPreview] = []
-
-    for u in users:
-        for req in u.requested_books or []:
-            if req.status == RequestStatus.DENIED and req.id not in seen_ids:
-                seen_ids.add(req.id)
-                previews.append(BookRequestPreview(
-                    user_id=u.id,
-                    username=u.username,
-                    email=u.email,
-                    id=req.id,
-                    title=req.title,
-                    authors=req.authors,
-                    isbn=req.isbn,
-                    publisher=req.publisher,
-                    cover_image=req.cover_image,
-                    status=req.status,
-                    requested_at=req.requested_at,
-                    status_updated_at=req.status_updated_at
-                ))
-
-    return BookRequestPreviewListResponse(
-        code=SUCCESS,
-        message="Denied requests retrieved",
-        requests=previews,
-        total=len(previews),
-        page=1,
-        has_next=False,
-        last_page=1
-    )
+async def list_denied_requests(
+    page: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    admin=Depends(get_current_admin_principal)
+):
+    return await list_request_page({"status": RequestStatus.DENIED.value}, page, limit, "Denied requests retrieved")
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Path
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from typing import Optional, List
+from typing import Optional
 from rapidfuzz import fuzz
-from internal.utils.utils import get_current_admin
-from internal.types.responses import PublicUserResponse, FailResponse, SuccessResponse
+from internal.utils.utils import get_current_admin_principal
+from internal.types.responses import UserDetailsResponse, FailResponse, SuccessResponse, JobResponse
 from internal.types.types import SUCCESS, FAIL, NEED_ACTION
-from internal.database.users import get_all_users, get_user_by_id
-from internal.models.user import User, PublicUser, UserPreview, PaginatedUserPreviewListResponse
+from internal.database.users import (
+    get_user_by_id, get_user_ids_by_username_ci, get_user_ids_by_email_ci,
+    build_users_query, count_users, get_user_previews, get_user_search_fields
+)
+from internal.search.user_index import search_user_candidates
+from internal.models.user import UserDetails, PaginatedUserPreviewListResponse
 from internal.utils.email import generate_penalty_email_html, generate_penalty_email_html_for_book, send_email_to_user
 from internal.database.users import ban_user, unban_user
-from internal.database.books import delete_book_by_id, remove_book_from_notify_lists, clear_books_from_user
+from internal.database.requests import get_user_requests
+from internal.database.books import clear_books_from_user
+from internal.database.jobs import get_job_by_id
+from internal.jobs.user_cleanup import HARD_BAN_JOB, start_hard_ban_cleanup
+from internal.models.job import JobProgress
 
 
 router = APIRouter(prefix="/admin")
@@ -23,57 +31,36 @@ async def list_users(
     q: Optional[str] = Query(None, min_length=1),
     only_with_penalties: bool = Query(False),
     only_banned: bool = Query(False),
-    admin=Depends(get_current_admin)
+    admin=Depends(get_current_admin_principal)
 ):
-    all_users: List[User] = await get_all_users()
-    q_lower = q.lower() if q else None
-    filtered_users: List[User] = []
-
-    if q_lower:
-        exact_username_matches = [user for user in all_users if user.username.lower() == q_lower]
-
-        if exact_username_matches:
-            filtered_users = exact_username_matches
-        else:
-            exact_email_matches = [user for user in all_users if user.email.lower() == q_lower]
-            if exact_email_matches:
-                filtered_users = exact_email_matches
-            else:
-                threshold = 60
-                for user in all_users:
-                    username_match = fuzz.partial_ratio(q_lower, user.username.lower())
-                    email_match = fuzz.partial_ratio(q_lower, user.email.lower())
-                    if max(username_match, email_match) >= threshold:
-                        filtered_users.append(user)
-    else:
-        filtered_users = all_users
-
-    if only_with_penalties:
-        filtered_users = [user for user in filtered_users if user.penalties and len(user.penalties) > 0]
-
-    if only_banned:
-        filtered_users = [user for user in filtered_users if user.banned]
-
-    total_users = len(filtered_users)
+    query = build_users_query(only_with_penalties=only_with_penalties, only_banned=only_banned)
+
+    if q:
+        # Exact logins resolve through the case-insensitive indexes before any fuzzy matching
+        matched_ids = await get_user_ids_by_username_ci(q)
+        if not matched_ids:
+            matched_ids = await get_user_ids_by_email_ci(q)
+
+        if not matched_ids:
+            q_lower = q.lower()
+            threshold = 60
+            candidates = await get_user_search_fields({**query, "_id": {"$in": search_user_candidates(q)}})
+            matched_ids = [
+                doc["_id"] for doc in candidates
+                if max(
+                    fuzz.partial_ratio(q_lower, doc["username"].lower()),
+                    fuzz.partial_ratio(q_lower, doc["email"].lower())
+                ) >= threshold
+            ]
+        query = {**query, "_id": {"$in": matched_ids}}
+
+    total_users = await count_users(query)
     last_page = (total_users + limit - 1) // limit
     page = min(page, last_page) if last_page > 0 else 1
     start = (page - 1) * limit
     end = start + limit
 
-    paginated_users = filtered_users[start:end]
-
-    user_previews = [
-        UserPreview(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            borrow_count=len(user.borrowed_books or []),
-            penalty_fee=sum(p.amount for p in user.penalties or []),
-            has_penalty=bool(user.penalties and len(user.penalties) > 0),
-            banned=user.banned
-        )
-        for user in paginated_users
-    ]
+    user_previews = await get_user_previews(query, skip=start, limit=limit)
 
     return PaginatedUserPreviewListResponse(
         code=SUCCESS,
@@ -86,8 +73,8 @@ async def list_users(
     )
 
 
-@router.get("/users/{user_id}", response_model=PublicUserResponse)
-async def get_user_details(user_id: str, admin=Depends(get_current_admin)):
+@router.get("/users/{user_id}", response_model=UserDetailsResponse)
+async def get_user_details(user_id: str, admin=Depends(get_current_admin_principal)):
     user = await get_user_by_id(user_id)
     if not user:
         return JSONResponse(
@@ -98,10 +85,10 @@ async def get_user_details(user_id: str, admin=Depends(get_current_admin)):
             ))
         )
 
-    return PublicUserResponse(
+    return UserDetailsResponse(
         code=SUCCESS,
         message="User details retrieved successfully",
-        user=PublicUser(
+        user=UserDetails(
             id=user.id,
             username=user.username,
             email=user.email,
@@ -109,7 +96,7 @@ async def get_user_details(user_id: str, admin=Depends(get_current_admin)):
             borrowed_books=user.borrowed_books,
             borrowed_history=user.borrowed_history,
             overdue_books=user.overdue_books,
-            requested_books=user.requested_books,
+            requested_books=await get_user_requests(user.id),
             notify_me_list=user.notify_me_list,
             penalties=user.penalties,
             banned=user.banned
@@ -118,7 +105,7 @@ async def get_user_details(user_id: str, admin=Depends(get_current_admin)):
 
 
 @router.post("/ban/{user_id}", response_model=SuccessResponse)
-async def ban_user_endpoint(user_id: str, admin=Depends(get_current_admin)):
+async def ban_user_endpoint(user_id: str, admin=Depends(get_current_admin_principal)):
     user = await get_user_by_id(user_id)
     if not user:
         return JSONResponse(
@@ -151,8 +138,8 @@ async def ban_user_endpoint(user_id: str, admin=Depends(get_current_admin)):
     )
 
 
-@router.post("/hard-ban/{user_id}", response_model=SuccessResponse)
-async def hard_ban_user_endpoint(user_id: str, admin=Depends(get_current_admin)):
+@router.post("/hard-ban/{user_id}", response_model=JobResponse, status_code=202)
+async def hard_ban_user_endpoint(user_id: str, admin=Depends(get_current_admin_principal)):
     user = await get_user_by_id(user_id)
     if not user:
         return JSONResponse(
@@ -160,28 +147,40 @@ async def hard_ban_user_endpoint(user_id: str, admin=Depends(get_current_admin))
             content=jsonable_encoder(FailResponse(code=FAIL, message="User not found"))
         )
 
-    book_ids = list(user.borrowed_books or [])
-
-    # 1) delete the books themselves and clean notify lists
-    for book_id in book_ids:
-        await delete_book_by_id(book_id)
-        await remove_book_from_notify_lists(book_id)
-
-    # 2) mark the user as banned
-    if not await ban_user(user_id):
+    # 1) mark the user as banned
+    if not user.banned and not await ban_user(user_id):
         return JSONResponse(
             status_code=500,
             content=jsonable_encoder(FailResponse(code=FAIL, message="Failed to hard-ban the user"))
         )
 
-    return SuccessResponse(
+    # 2) delete the books themselves and their references in the background
+    job = await start_hard_ban_cleanup(user_id, list(user.borrowed_books or []))
+    return JobResponse(
+        code=SUCCESS,
+        message="User hard-banned; borrowed books are being removed from library",
+        job=JobProgress(**job.model_dump())
+    )
+
+
+@router.get("/hard-ban/jobs/{job_id}", response_model=JobResponse)
+async def get_hard_ban_progress(job_id: str = Path(...), admin=Depends(get_current_admin_principal)):
+    job = await get_job_by_id(job_id)
+    if not job or job.type != HARD_BAN_JOB:
+        return JSONResponse(
+            status_code=404,
+            content=jsonable_encoder(FailResponse(code=FAIL, message="Hard-ban job not found"))
+        )
+
+    return JobResponse(
         code=SUCCESS,
-        message="User hard-banned; borrowed books removed from library"
+        message="Hard-ban job progress retrieved",
+        job=JobProgress(**job.model_dump())
     )
 
 
 @router.post("/unban/{user_id}", response_model=SuccessResponse)
-async def unban_user_endpoint(user_id: str, admin=Depends(get_current_admin)):
+async def unban_user_endpoint(user_id: str, admin=Depends(get_current_admin_principal)):
     user = await get_user_by_id(user_id)
     if not user:
         return JSONResponse(
@@ -211,7 +210,7 @@ async def unban_user_endpoint(user_id: str, admin=Depends(get_current_admin)):
 
 
 @router.post("/notify/{user_id}", response_model=SuccessResponse)
-async def notify_penalty_user(user_id: str, admin=Depends(get_current_admin)):
+async def notify_penalty_user(user_id: str, admin=Depends(get_current_admin_principal)):
     user = await get_user_by_id(user_id)
     if not user:
         return JSONResponse(
@@ -240,7 +239,7 @@ async def notify_penalty_user(user_id: str, admin=Depends(get_current_admin)):
 
 
 @router.post("/notify/{user_id}/book/{book_id}", response_model=SuccessResponse)
-async def notify_penalty_user_by_book(user_id: str, book_id: str, admin=Depends(get_current_admin)):
+async def notify_penalty_user_by_book(user_id: str, book_id: str, admin=Depends(get_current_admin_principal)):
     user = await get_user_by_id(user_id)
     if not user:
         return JSONResponse(
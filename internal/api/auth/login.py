@@ -4,7 +4,8 @@ from fastapi.encoders import jsonable_encoder
 from internal.utils.logger import logger
 from internal.models.user import User, PublicUser
 from internal.models.admin import PublicAdmin
-from internal.utils.utils import hash_password, verify_token_owner
+from internal.utils.utils import verify_token_owner
+from internal.utils.passwords import hash_password, verify_password
 from internal.tokens.tokens import create_access_token, create_refresh_token
 from internal.database.users import create_user, get_user_by_email, get_user_by_username
 from internal.database.admins import get_admin_by_email, get_admin_by_username
@@ -51,7 +52,7 @@ async def register_user(
     user = User(
         username=request_body.username,
         email=request_body.email,
-        password=hash_password(request_body.password),
+        password=await hash_password(request_body.password),
         role="user",
     )
 
@@ -104,7 +105,7 @@ async def login_user(
         entity = await get_admin_by_email(request_body.email)
         role = "admin"
 
-    if not entity or not entity.check_password(request_body.password):
+    if not entity or not await verify_password(request_body.password, entity.password):
         return JSONResponse(
             status_code=401,
             content=jsonable_encoder(FailResponse(
@@ -1,29 +1,45 @@
 import pycountry
+from datetime import timedelta
+from functools import lru_cache
 from rapidfuzz import fuzz
-from typing import Optional
+from typing import List, Optional
 from isbnlib import is_isbn10, is_isbn13
 from fastapi import APIRouter, Query, Depends
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from internal.models.book import BookPreview
+from config.config import get_config
 from internal.utils.utils import get_scanned_book
-from internal.database.books import get_all_books, get_book_by_id, get_book_by_isbn
+from internal.database.books import (
+    get_all_books, get_book_by_id, get_book_previews, get_book_preview_by_isbn,
+    get_book_previews_by_ids, get_existing_book_ids, get_books_count,
+    build_books_query, build_books_sort, count_books, POPULARITY_SORT
+)
+from internal.database.borrow_events import get_popular_book_ids_since
+from internal.utils.cache import utcnow
+from internal.search.book_index import (
+    CANDIDATE_LIMIT, search_book_candidates, suggest_completions, related_index, facet_index
+)
+from internal.database.related_books import get_related_book_ids, save_related_rows
+from internal.search.prefix_index import MAX_SUGGESTIONS
 from internal.database.users import get_all_users
-from internal.types.types import SUCCESS, FAIL, LanguageItem
+from internal.types.types import SUCCESS, FAIL, LanguageItem, Suggestion
 from internal.types.responses import (
     FailResponse,
-    BookListResponse,
     BookResponse,
     GroupedCategoryListResponse,
     GroupedCategory,
     BookPreviewListResponse,
     PaginatedBookPreviewListResponse,
     LanguageListResponse,
-    BooksOverviewResponse
+    BooksOverviewResponse,
+    SuggestionListResponse,
+    FacetsResponse
 )
 
 router = APIRouter()
 
+POPULAR_BOOKS_LIMIT = 100
+
 
 @router.get("/books", response_model=PaginatedBookPreviewListResponse)
 async def list_books(
@@ -40,8 +56,8 @@ async def list_books(
     max_page_count: Optional[int] = Query(None, ge=1)
 ):
     if q and (is_isbn10(q) or is_isbn13(q)):
-        book = await get_book_by_isbn(q)
-        if not book:
+        preview = await get_book_preview_by_isbn(q)
+        if not preview:
             return JSONResponse(
                 status_code=404,
                 content=jsonable_encoder(
@@ -49,17 +65,6 @@ async def list_books(
                 )
             )
 
-        preview = BookPreview(
-            id=book.id,
-            title=book.title,
-            authors=book.authors,
-            categories=book.categories,
-            publisher=book.publisher,
-            cover_image=book.cover_image,
-            borrowed=book.borrowed,
-            isbn=book.isbn,
-            currently_borrowed_by=book.currently_borrowed_by
-        )
         return PaginatedBookPreviewListResponse(
             code=SUCCESS,
             message="Book found by ISBN",
@@ -70,87 +75,39 @@ async def list_books(
             last_page=1
         )
 
-    all_books = await get_all_books()
-    threshold = 85
-    filtered_books = []
-
-    q_lower = q.lower() if q else None
-
-    for book in all_books:
-        # Fuzzy matching
-        if q_lower:
-            if (
-                q_lower in book.title.lower()
-                or any(q_lower in author.lower() for author in book.authors)
-                or any(q_lower in (cat.category or "").lower() or q_lower in (cat.subcategory or "").lower() for cat in book.categories or [])
-                or (book.publisher and q_lower in book.publisher.lower())
-            ):
-                pass
-            else:
-                title_match = fuzz.partial_ratio(q_lower, book.title.lower())
-                author_match = max((fuzz.partial_ratio(q_lower, author.lower()) for author in book.authors), default=0)
-                category_scores = [
-                    fuzz.partial_ratio(q_lower, cat.category.lower())
-                    for cat in book.categories if cat.category
-                ] + [
-                    fuzz.partial_ratio(q_lower, cat.subcategory.lower())
-                    for cat in book.categories if cat.subcategory
-                ]
-                category_match = max(category_scores, default=0)
-                publisher_match = fuzz.partial_ratio(q_lower, book.publisher.lower()) if book.publisher else 0
-
-                if max([title_match, author_match, category_match, publisher_match]) < threshold:
-                    continue
-
-        # Filters
-        if available_only and book.borrowed:
-            continue
-        if borrowed_only and not book.borrowed:
-            continue
-        if max_page_count and book.page_count and book.page_count > max_page_count:
-            continue
-        if language and (book.language or "").lower() != language.lower():
-            continue
-        if category:
-            if not any(cat.category and cat.category.lower() == category.lower() for cat in book.categories):
-                continue
-        if subcategory:
-            if not any(cat.subcategory and cat.subcategory.lower() == subcategory.lower() for cat in book.categories):
-                continue
-
-        filtered_books.append(book)
-
-    # Apply sorting
-    if most_borrowed:
-        filtered_books.sort(key=lambda b: b.borrow_count, reverse=True)
-    elif recently_added:
-        filtered_books.sort(key=lambda b: b.added_at, reverse=True)
-
-    total_books = len(filtered_books)
-    last_page = (total_books + limit - 1) // limit
-    page = min(page, last_page) if last_page > 0 else 1
-    start = (page - 1) * limit
-    end = start + limit
-
-    paginated_books = filtered_books[start:end]
-
-    previews = [
-        BookPreview(
-            id=book.id,
-            title=book.title,
-            authors=book.authors,
-            categories=book.categories,
-            publisher=book.publisher,
-            cover_image=book.cover_image,
-            borrowed=book.borrowed,
-            isbn=book.isbn,
-            borrowed_at=book.borrowed_at,
-            return_date=book.return_date,
-            has_penalty=book.has_penalty,
-            currently_borrowed_by=book.currently_borrowed_by
-        )
-        for book in paginated_books
-    ]
+    # Filters run in MongoDB after the shortlist, so a capped shortlist would
+    # drop matching books and undercount the total
+    filtered = any([category, subcategory, language, available_only, borrowed_only, max_page_count])
+    query = build_books_query(
+        book_ids=search_book_candidates(q, None if filtered else CANDIDATE_LIMIT) if q else None,
+        category=category,
+        subcategory=subcategory,
+        language=language,
+        available_only=available_only,
+        borrowed_only=borrowed_only,
+        max_page_count=max_page_count
+    )
+    sort = build_books_sort(most_borrowed=most_borrowed, recently_added=recently_added)
+
+    if q:
+        # Fuzzy scoring runs over the index shortlist narrowed by the filters, or
+        # over every filtered book when the index can't serve the query
+        candidates = await get_book_previews(query, sort)
+        filtered_books = [book for book in candidates if matches_catalog_query(book, q.lower())]
+
+        total_books = len(filtered_books)
+        last_page = (total_books + limit - 1) // limit
+        page = min(page, last_page) if last_page > 0 else 1
+        start = (page - 1) * limit
+        end = start + limit
+        previews = filtered_books[start:end]
+    else:
+        total_books = await count_books(query)
+        last_page = (total_books + limit - 1) // limit
+        page = min(page, last_page) if last_page > 0 else 1
+        start = (page - 1) * limit
+        end = start + limit
+        previews = await get_book_previews(query, sort, skip=start, limit=limit)
 
     return PaginatedBookPreviewListResponse(
         code=SUCCESS,
@@ -163,6 +120,48 @@ async def list_books(
     )
 
 
+def matches_catalog_query(book, q_lower: str, threshold: int = 85) -> bool:
+    if (
+        q_lower in book.title.lower()
+        or any(q_lower in author.lower() for author in book.authors)
+        or any(q_lower in (cat.category or "").lower() or q_lower in (cat.subcategory or "").lower() for cat in book.categories or [])
+        or (book.publisher and q_lower in book.publisher.lower())
+    ):
+        return True
+
+    title_match = fuzz.partial_ratio(q_lower, book.title.lower())
+    author_match = max((fuzz.partial_ratio(q_lower, author.lower()) for author in book.authors), default=0)
+    category_scores = [
+        fuzz.partial_ratio(q_lower, cat.category.lower())
+        for cat in book.categories if cat.category
+    ] + [
+        fuzz.partial_ratio(q_lower, cat.subcategory.lower())
+        for cat in book.categories if cat.subcategory
+    ]
+    category_match = max(category_scores, default=0)
+    publisher_match = fuzz.partial_ratio(q_lower, book.publisher.lower()) if book.publisher else 0
+
+    return max([title_match, author_match, category_match, publisher_match]) >= threshold
+
+
+# Declared before /books/{book_id} so "suggest" is not taken for a book id
+@router.get("/books/suggest", response_model=SuggestionListResponse)
+async def suggest_books(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)
+):
+    suggestions = [
+        Suggestion(text=text, type=kind, count=count)
+        for text, kind, count in suggest_completions(q, limit)
+    ]
+
+    return SuggestionListResponse(
+        code=SUCCESS,
+        message="Suggestions retrieved successfully",
+        suggestions=suggestions
+    )
+
+
 @router.get("/books/{book_id}", response_model=BookResponse)
 async def get_book(book_id: str):
     book = await get_book_by_id(book_id)
@@ -193,8 +192,8 @@ async def search_books(q: str = Query(...)):
     # Check if the query is a valid ISBN
     is_isbn = is_isbn10(q) or is_isbn13(q)
     if is_isbn:
-        book = await get_book_by_isbn(q)
-        if not book:
+        preview = await get_book_preview_by_isbn(q)
+        if not preview:
             return JSONResponse(
                 status_code=404,
                 content=jsonable_encoder(
@@ -202,17 +201,6 @@ async def search_books(q: str = Query(...)):
                 )
             )
 
-        preview = BookPreview(
-            id=book.id,
-            title=book.title,
-            authors=book.authors,
-            categories=book.categories,
-            publisher=book.publisher,
-            cover_image=book.cover_image,
-            borrowed=book.borrowed,
-            isbn=book.isbn,
-            currently_borrowed_by=book.currently_borrowed_by
-        )
         return BookPreviewListResponse(
             code=SUCCESS,
             message="Book found by ISBN",
@@ -220,7 +208,7 @@ async def search_books(q: str = Query(...)):
         )
 
     # Proceed with fuzzy search if not an ISBN
-    all_books = await get_all_books()
+    all_books = await get_book_previews({})
     threshold = 60
     matched = []
 
@@ -254,25 +242,10 @@ async def search_books(q: str = Query(...)):
             )
         )
 
-    previews = [
-        BookPreview(
-            id=book.id,
-            title=book.title,
-            authors=book.authors,
-            categories=book.categories,
-            publisher=book.publisher,
-            cover_image=book.cover_image,
-            borrowed=book.borrowed,
-            isbn=book.isbn,
-            currently_borrowed_by=book.currently_borrowed_by
-        )
-        for book in matched
-    ]
-
     return BookPreviewListResponse(
         code=SUCCESS,
         message="Books found by query",
-        books=previews
+        books=matched
     )
 
 
@@ -296,126 +269,119 @@ async def get_public_library_overview():
     )
 
 
-@router.get("/books/search/categories", response_model=GroupedCategoryListResponse)
-async def list_categories():
-    books = await get_all_books()
-    category_map: dict[str, set[str]] = {}
-
-    for book in books:
-        for cat in book.categories or []:
-            if not cat.category:
-                continue
-            category = cat.category.strip()
-            subcategory = cat.subcategory.strip() if cat.subcategory else None
-
-            if category not in category_map:
-                category_map[category] = set()
-            if subcategory:
-                category_map[category].add(subcategory)
-
-    grouped = [
-        GroupedCategory(category=cat, subcategories=sorted(subs))
-        for cat, subs in sorted(category_map.items())
+def _category_facets() -> List[GroupedCategory]:
+    return [
+        GroupedCategory(
+            category=category,
+            subcategories=[subcategory for subcategory, _ in subcategories],
+            count=count,
+            subcategory_counts=dict(subcategories)
+        )
+        for category, count, subcategories in facet_index.categories()
     ]
 
+
+@lru_cache(maxsize=None)
+def _language_name(code: str) -> Optional[str]:
+    lang = pycountry.languages.get(alpha_2=code)
+    return lang.name if lang else None
+
+
+def _language_facets() -> List[LanguageItem]:
+    languages: List[LanguageItem] = []
+    for code, count in facet_index.languages():
+        name = _language_name(code)
+        if name:
+            languages.append(LanguageItem(Language=name, Key=code, Count=count))
+    return languages
+
+
+@router.get("/books/search/facets", response_model=FacetsResponse)
+async def list_facets():
+    return FacetsResponse(
+        code=SUCCESS,
+        message="Facets retrieved successfully",
+        categories=_category_facets(),
+        languages=_language_facets()
+    )
+
+
+@router.get("/books/search/categories", response_model=GroupedCategoryListResponse)
+async def list_categories():
     return GroupedCategoryListResponse(
         code=SUCCESS,
         message="Categories grouped successfully",
-        categories=grouped
+        categories=_category_facets()
     )
 
 
-@router.get("/books/search/popular", response_model=BookListResponse)
-async def list_popular_books():
-    books = await get_all_books()
-    sorted_books = sorted(books, key=lambda x: (x.borrow_count, x.added_at), reverse=True)
-    return BookListResponse(
+@router.get("/books/search/popular", response_model=PaginatedBookPreviewListResponse)
+async def list_popular_books(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=POPULAR_BOOKS_LIMIT),
+    days: Optional[int] = Query(None, ge=1, le=get_config("borrow_event_retention_days"))
+):
+    if days:
+        # Windowed popularity is ranked from the borrow event log
+        ranked = await get_popular_book_ids_since(utcnow() - timedelta(days=days), POPULAR_BOOKS_LIMIT)
+        book_ids = await get_existing_book_ids([book_id for book_id, _ in ranked])
+        total_books = len(book_ids)
+    else:
+        total_books = min(await get_books_count(), POPULAR_BOOKS_LIMIT)
+
+    last_page = (total_books + limit - 1) // limit
+    page = min(page, last_page) if last_page > 0 else 1
+    start = (page - 1) * limit
+    end = min(start + limit, total_books)
+
+    if total_books == 0:
+        previews = []
+    elif days:
+        previews = await get_book_previews_by_ids(book_ids[start:end])
+    else:
+        previews = await get_book_previews({}, POPULARITY_SORT, skip=start, limit=end - start)
+
+    return PaginatedBookPreviewListResponse(
         code=SUCCESS,
         message="Popular books retrieved successfully",
-        books=sorted_books
+        books=previews,
+        total=total_books,
+        page=page,
+        has_next=end < total_books and page < last_page,
+        last_page=last_page
     )
 
 
 @router.get("/books/{book_id}/related", response_model=BookPreviewListResponse)
 async def related_books(book_id: str):
-    original = await get_book_by_id(book_id)
-    if not original:
-        return JSONResponse(
-            status_code=404,
-            content=jsonable_encoder(
-                FailResponse(code=FAIL, message="Book not found")
+    related_ids = await get_related_book_ids(book_id)
+    if related_ids is None:
+        # Books without a precomputed row yet are scored on demand
+        related_ids = related_index.neighbors(book_id)
+        if related_ids is None:
+            return JSONResponse(
+                status_code=404,
+                content=jsonable_encoder(
+                    FailResponse(code=FAIL, message="Book not found")
+                )
             )
-        )
-
-    original_categories = {c.category.lower() for c in original.categories if c.category}
-    original_isbn = original.isbn
-    all_books = await get_all_books()
-    related = []
-
-    for book in all_books:
-        if book.id == original.id or (original_isbn and book.isbn == original_isbn):
-            continue
-
-        for cat in book.categories or []:
-            if cat.category and cat.category.lower() in original_categories:
-                related.append(book)
-                break
-
-    if not related:
-        threshold = 60
-        for book in all_books:
-            if book.id == original.id or (original_isbn and book.isbn == original_isbn):
-                continue
-
-            score = 0
-            for oc in original.categories:
-                for bc in book.categories or []:
-                    oc_full = f"{oc.category} / {oc.subcategory}" if oc.subcategory else oc.category
-                    bc_full = f"{bc.category} / {bc.subcategory}" if bc.subcategory else bc.category
-                    score = max(score, fuzz.partial_ratio(oc_full.lower(), bc_full.lower()))
-
-            if score >= threshold:
-                related.append(book)
-
-    sorted_related = sorted(related, key=lambda x: (x.borrow_count, x.added_at), reverse=True)
-
-    previews = [
-        BookPreview(
-            id=book.id,
-            title=book.title,
-            authors=book.authors,
-            categories=book.categories,
-            publisher=book.publisher,
-            cover_image=book.cover_image,
-            borrowed=book.borrowed,
-            isbn=book.isbn,
-            currently_borrowed_by=book.currently_borrowed_by
-        )
-        for book in sorted_related
-    ]
+        await save_related_rows({book_id: related_ids})
 
+    # Rows are ordered by similarity, so previews keep the stored order
+    related = await get_book_previews_by_ids(related_ids)
     return BookPreviewListResponse(
         code=SUCCESS,
         message="Related books retrieved successfully",
-        books=previews
+        books=related
     )
 
 
 @router.get("/books/search/languages", response_model=LanguageListResponse)
 async def list_languages():
-    books = await get_all_books()
-    language_codes = {book.language for book in books if book.language}
-
-    languages: list[LanguageItem] = []
-    for code in sorted(language_codes):
-        lang = pycountry.languages.get(alpha_2=code)
-        if lang:
-            languages.append(LanguageItem(Language=lang.name, Key=code))
-
     return LanguageListResponse(
         code=SUCCESS,
         message="Languages retrieved successfully",
-        languages=languages
+        languages=_language_facets()
     )
 
 
@@ -1,16 +1,22 @@
-import asyncio
-from fastapi import APIRouter, Query, Body
+from fastapi import APIRouter, Query, Body, Path
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from internal.database.books import create_book, get_book_by_isbn
+from internal.database.books import create_book
+from internal.database.jobs import get_job_by_id
 from internal.types.types import SUCCESS, FAIL
 from internal.utils.google_books import search_google_books, fetch_google_book
+from internal.jobs.book_import import (
+    BOOK_IMPORT_JOB,
+    start_book_import,
+    schedule_book_import,
+)
 from internal.models.book import BookPreview, BookCategory
+from internal.models.job import JobProgress, JobStatus
 from internal.types.responses import (
     FailResponse,
     BookResponse,
     PaginatedBookPreviewListResponse,
-    BulkExternalBookAddResponse,
+    JobResponse,
 )
 
 router = APIRouter()
@@ -22,7 +28,7 @@ async def search_books_external(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=40)
 ):
-    results = search_google_books(q)
+    results = await search_google_books(q)
     if not results:
         return JSONResponse(
             status_code=404,
@@ -65,7 +71,7 @@ async def search_books_external(
 
 @router.post("/google-books/add", response_model=BookResponse)
 async def add_book_from_external(volume_id: str = Body(..., embed=True)):
-    book = fetch_google_book(volume_id)
+    book = await fetch_google_book(volume_id)
     if not book:
         return JSONResponse(
             status_code=404,
@@ -90,50 +96,58 @@ async def add_book_from_external(volume_id: str = Body(..., embed=True)):
     )
 
 
-@router.post("/google-books/add/bulk", response_model=BulkExternalBookAddResponse)
+@router.post("/google-books/add/bulk", response_model=JobResponse, status_code=202)
 async def bulk_add_books_from_external(
     isbns: list[str] = Body(..., embed=True)
 ):
-    created_books = []
-    failed_isbns = []
-
-    for isbn in isbns:
-        exists = await get_book_by_isbn(isbn)
-        if exists:
-            continue
-
-        # Add small delay
-        await asyncio.sleep(0.3)
-        matches = search_google_books(isbn)
-        if not matches:
-            failed_isbns.append(isbn)
-            continue
-
-        volume_id = matches[0]["id"]
-        book = fetch_google_book(volume_id)
-        if not book:
-            failed_isbns.append(isbn)
-            continue
-
-        created = await create_book(book)
-        if not created:
-            failed_isbns.append(isbn)
-            continue
-
-        created_books.append(
-            BookPreview(
-                id=created.id,
-                title=created.title,
-                authors=created.authors,
-                categories=created.categories,
-            )
+    job = await start_book_import(isbns)
+
+    return JobResponse(
+        code=SUCCESS,
+        message="Bulk import started",
+        job=JobProgress(**job.model_dump())
+    )
+
+
+@router.get("/google-books/add/bulk/{job_id}", response_model=JobResponse)
+async def get_bulk_import_progress(job_id: str = Path(...)):
+    job = await get_job_by_id(job_id)
+    if not job or job.type != BOOK_IMPORT_JOB:
+        return JSONResponse(
+            status_code=404,
+            content=jsonable_encoder(FailResponse(code=FAIL, message="Import job not found"))
+        )
+
+    return JobResponse(
+        code=SUCCESS,
+        message="Import job progress retrieved",
+        job=JobProgress(**job.model_dump())
+    )
+
+
+@router.post("/google-books/add/bulk/{job_id}/resume", response_model=JobResponse)
+async def resume_bulk_import(job_id: str = Path(...)):
+    job = await get_job_by_id(job_id)
+    if not job or job.type != BOOK_IMPORT_JOB:
+        return JSONResponse(
+            status_code=404,
+            content=jsonable_encoder(FailResponse(code=FAIL, message="Import job not found"))
+        )
+
+    if job.status == JobStatus.COMPLETED:
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder(FailResponse(code=FAIL, message="Import job has already completed"))
+        )
+
+    if not schedule_book_import(job.id):
+        return JSONResponse(
+            status_code=409,
+            content=jsonable_encoder(FailResponse(code=FAIL, message="Import job is already running"))
         )
 
-    return BulkExternalBookAddResponse(
-        code=SUCCESS if created_books else FAIL,
-        message="Books added successfully from external source"
-        if created_books else "No books were added",
-        success_count=len(created_books),
-        failed_count=len(failed_isbns),
-        failed_isbns=failed_isbns
+    return JobResponse(
+        code=SUCCESS,
+        message="Import job resumed",
+        job=JobProgress(**job.model_dump())
     )
@@ -6,9 +6,11 @@ from fastapi import APIRouter, Depends, Body
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from internal.models.request import BookRequest, RequestStatus
-from internal.models.user import User
-from internal.utils.utils import get_current_user
-from internal.database.users import update_user, get_user_by_id
+from internal.utils.utils import get_current_user_principal
+from internal.models.principal import Principal
+from internal.database.requests import (
+    create_user_request, get_user_requests, get_user_request, delete_user_request, count_active_user_requests
+)
 from internal.types.types import SUCCESS, FAIL
 from internal.types.responses import (
     SuccessResponse,
@@ -19,28 +21,19 @@ router = APIRouter()
 
 
 @router.post("/request-book", response_model=SuccessResponse)
-async def request_book(data: BookRequest = Body(...), user: User = Depends(get_current_user)):
-    user = await get_user_by_id(user.id)
-    if not user.requested_books:
-        user.requested_books = []
-
+async def request_book(data: BookRequest = Body(...), principal: Principal = Depends(get_current_user_principal)):
     # Check for duplicates
-    for existing in user.requested_books:
-        if existing.id and existing.id == data.id:
-            return JSONResponse(
-                status_code=400,
-                content=jsonable_encoder(FailResponse(
-                    code=FAIL,
-                    message="You have already requested this book."
-                ))
-            )
+    if await get_user_request(principal.id, data.id):
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder(FailResponse(
+                code=FAIL,
+                message="You have already requested this book."
+            ))
+        )
 
     # Count only active requests
-    active_requests = [
-        r for r in user.requested_books
-        if r.status not in {RequestStatus.ADDED, RequestStatus.DENIED, RequestStatus.APPROVED}
-    ]
-    if len(active_requests) >= 10:
+    if await count_active_user_requests(principal.id) >= 10:
         return JSONResponse(
             status_code=400,
             content=jsonable_encoder(FailResponse(
@@ -52,14 +45,13 @@ async def request_book(data: BookRequest = Body(...), user: User = Depends(get_c
 
     # Proceed with request
     data.requested_at = datetime.now()
-    user.requested_books.append(data)
-    updated = await update_user(user)
-    if not updated:
+    created = await create_user_request(principal.id, data)
+    if not created:
         return JSONResponse(
-            status_code=500,
+            status_code=400,
             content=jsonable_encoder(FailResponse(
                 code=FAIL,
-                message="Failed to update your request. Please try again later."
+                message="You have already requested this book."
             ))
         )
 
@@ -71,12 +63,13 @@ async def request_book(data: BookRequest = Body(...), user: User = Depends(get_c
 
 @router.get("/request-book", response_model=PaginatedBookRequestListResponse)
 async def get_requested_books(
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_user_principal),
     page: int = Query(1, ge=1),
     limit: int = Query(25, ge=1, le=100),
     q: Optional[str] = Query(None, min_length=1)
 ):
-    if not user.requested_books:
+    requested_books = await get_user_requests(principal.id)
+    if not requested_books:
         return PaginatedBookRequestListResponse(
             code=SUCCESS,
             message="No requested books found",
@@ -91,7 +84,7 @@ async def get_requested_books(
     threshold = 85
     filtered = []
 
-    for req in user.requested_books:
+    for req in requested_books:
         if not q_lower:
             filtered.append(req)
             continue
@@ -138,19 +131,10 @@ async def get_requested_books(
 
 
 @router.get("/requests/{request_id}", response_model=BookRequest)
-async def get_requested_book(request_id: str, user: User = Depends(get_current_user)):
-    if not user.requested_books:
-        return JSONResponse(
-            status_code=404,
-            content=jsonable_encoder(FailResponse(
-                code=FAIL,
-                message="No requested books found"
-            ))
-        )
-
-    for request in user.requested_books:
-        if request.id == request_id:
-            return request
+async def get_requested_book(request_id: str, principal: Principal = Depends(get_current_user_principal)):
+    request = await get_user_request(principal.id, request_id)
+    if request:
+        return request
 
     return JSONResponse(
         status_code=404,
@@ -162,17 +146,8 @@ async def get_requested_book(request_id: str, user: User = Depends(get_current_u
 
 
 @router.delete("/requests/{request_id}", response_model=SuccessResponse)
-async def delete_requested_book(request_id: str, user: User = Depends(get_current_user)):
-    if not user.requested_books:
-        return JSONResponse(
-            status_code=404,
-            content=jsonable_encoder(FailResponse(
-                code=FAIL,
-                message="No requested books found"
-            ))
-        )
-
-    matching = next((req for req in user.requested_books if req.id == request_id), None)
+async def delete_requested_book(request_id: str, principal: Principal = Depends(get_current_user_principal)):
+    matching = await get_user_request(principal.id, request_id)
     if not matching:
         return JSONResponse(
             status_code=404,
@@ -196,14 +171,13 @@ async def delete_requested_book(request_id: str, user: User = Depends(get_curren
             ))
         )
 
-    user.requested_books = [req for req in user.requested_books if req.id != request_id]
-    updated = await update_user(user)
-    if not updated:
+    deleted = await delete_user_request(principal.id, request_id)
+    if not deleted:
         return JSONResponse(
-            status_code=500,
+            status_code=404,
             content=jsonable_encoder(FailResponse(
                 code=FAIL,
-                message="Failed to update user data"
+                message="Requested book not found"
             ))
         )
 
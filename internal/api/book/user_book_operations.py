@@ -4,13 +4,16 @@ from typing import Optional, List
 from rapidfuzz import fuzz
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from internal.utils.utils import get_current_user, get_scanned_book
-from internal.utils.email import send_email_to_subscribers
-from internal.database.books import get_book_by_id, update_book
-from internal.database.users import update_user, get_user_by_id
+from internal.utils.utils import get_current_user, get_current_user_principal, get_scanned_book
+from internal.jobs.notify_subscribers import schedule_subscriber_notifications
+from internal.database.books import (
+    get_book_by_id, get_book_previews_by_ids, get_existing_book_ids, save_book
+)
+from internal.database.users import save_user
+from internal.database.loans import borrow_book_for_user, return_book_for_user
 from internal.types.types import SUCCESS, FAIL
 from internal.models.user import User
-from internal.models.book import BookPreview
+from internal.models.principal import Principal
 from internal.types.responses import (
     FailResponse,
     SuccessResponse,
@@ -64,7 +67,7 @@ async def get_overdue_books(
 @router.post("/borrow/{book_id}", response_model=SuccessResponse)
 async def borrow_book(
     book_id: str,
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_user_principal),
     scanned_book=Depends(get_scanned_book)
 ):
     if scanned_book.id != book_id:
@@ -85,32 +88,13 @@ async def borrow_book(
             )
         )
 
-    book.borrow_count += 1
-    book.return_date = datetime.combine((datetime.now() + timedelta(weeks=1)).date(), time(23, 59))
-    book.currently_borrowed_by = user.id
-    book.borrowed = True
-    book.borrowed_at = datetime.now()
-
-    updated = await update_book(book)
-    if not updated:
-        return JSONResponse(
-            status_code=500,
-            content=jsonable_encoder(
-                FailResponse(code=FAIL, message="Failed to update book data.")
-            )
-        )
-
-    if not user.borrowed_books:
-        user.borrowed_books = []
-    if book.id not in user.borrowed_books:
-        user.borrowed_books.append(book.id)
-
-    user_updated = await update_user(user)
-    if not user_updated:
+    return_date = datetime.combine((datetime.now() + timedelta(weeks=1)).date(), time(23, 59))
+    borrowed = await borrow_book_for_user(book.id, principal.id, return_date)
+    if not borrowed:
         return JSONResponse(
-            status_code=500,
+            status_code=409,
             content=jsonable_encoder(
-                FailResponse(code=FAIL, message="Failed to update user data.")
+                FailResponse(code=FAIL, message="Book is already borrowed")
             )
         )
 
@@ -148,11 +132,8 @@ async def notify_me(book_id: str, user: User = Depends(get_current_user)):
             code=SUCCESS, message="You have already subscribed."
         )
 
-    book.notify_me_list.append(user.id)
-    user.notify_me_list.append(book.id)
-
-    user_updated = await update_user(user)
-    book_updated = await update_book(book)
+    user_updated = await save_user(user, add_to_set={"notify_me_list": book.id})
+    book_updated = await save_book(book, add_to_set={"notify_me_list": user.id})
     if not book_updated or not user_updated:
         return JSONResponse(
             status_code=500,
@@ -204,48 +185,18 @@ async def return_book(
                     )
                 )
 
-    book.borrowed = False
-    book.currently_borrowed_by = None
-    book.last_borrowed_by = user.id
-    book.return_date = None
-
-    if book.notify_me_list:
-        for user_id in book.notify_me_list:
-            subject = f"Book '{book.title}' is now available"
-            sub_user = await get_user_by_id(user_id)
-            success = await send_email_to_subscribers(sub_user, book, subject)
-            if success:
-                sub_user.notify_me_list.remove(book_id)
-                sub_user_updated = await update_user(sub_user)
-            if sub_user_updated:
-                book.notify_me_list.remove(user_id)
-
-    updated_book = await update_book(book)
-    if not updated_book:
+    returned = await return_book_for_user(book.id, user.id)
+    if not returned:
         return JSONResponse(
-            status_code=500,
+            status_code=409,
             content=jsonable_encoder(
-                FailResponse(code=FAIL, message="Failed to update book data.")
+                FailResponse(code=FAIL, message="Book has already been returned.")
             )
         )
+    book = returned
 
-    if user.borrowed_books and book.id in user.borrowed_books:
-        user.borrowed_books.remove(book.id)
-    if user.overdue_books and book.id in user.overdue_books:
-        user.overdue_books.remove(book.id)
-    if not user.borrowed_history:
-        user.borrowed_history = []
-    if book.id not in user.borrowed_history:
-        user.borrowed_history.append(book.id)
-
-    updated_user = await update_user(user)
-    if not updated_user:
-        return JSONResponse(
-            status_code=500,
-            content=jsonable_encoder(
-                FailResponse(code=FAIL, message="Failed to update user data.")
-            )
-        )
+    # Subscribers are notified in the background so the return responds immediately
+    schedule_subscriber_notifications(book)
 
     return SuccessResponse(
         code=SUCCESS, message=f"You have returned '{book.title}' successfully."
@@ -303,7 +254,7 @@ async def extend_return(book_id: str, user: User = Depends(get_current_user)):
 
     book.return_date = (book.return_date + timedelta(days=7)).replace(hour=23, minute=59, second=0)
     book.has_extended = True
-    updated_book = await update_book(book)
+    updated_book = await save_book(book)
 
     if not updated_book:
         return JSONResponse(
@@ -330,14 +281,8 @@ async def remove_notify_me(book_id: str, user: User = Depends(get_current_user))
             )
         )
 
-    if user.id in book.notify_me_list:
-        book.notify_me_list.remove(user.id)
-
-    if book_id in user.notify_me_list:
-        user.notify_me_list.remove(book_id)
-
-    book_updated = await update_book(book)
-    user_updated = await update_user(user)
+    book_updated = await save_book(book, pull={"notify_me_list": user.id})
+    user_updated = await save_user(user, pull={"notify_me_list": book_id})
 
     if not book_updated or not user_updated:
         return JSONResponse(
@@ -387,35 +332,20 @@ def paginate_books(books, page: int, limit: int):
 
 
 async def get_previews(book_ids, q: Optional[str], page: int, limit: int):
-    books = []
-    for book_id in book_ids:
-        book = await get_book_by_id(book_id)
-        if book:
-            books.append(book)
-
-    filtered = filter_books(books, q)
-    paginated, total, last_page, page, has_next = paginate_books(filtered, page, limit)
-
-    previews = [
-        BookPreview(
-            id=book.id,
-            title=book.title,
-            authors=book.authors,
-            categories=book.categories,
-            publisher=book.publisher,
-            cover_image=book.cover_image,
-            borrowed=book.borrowed,
-            isbn=book.isbn,
-            borrowed_at=book.borrowed_at,
-            return_date=book.return_date,
-            currently_borrowed_by=book.currently_borrowed_by
-        ) for book in paginated
-    ]
+    if q:
+        books = await get_book_previews_by_ids(book_ids)
+        filtered = filter_books(books, q)
+        paginated, total, last_page, page, has_next = paginate_books(filtered, page, limit)
+    else:
+        # Page over the IDs first so only the visible slice is fetched
+        existing_ids = await get_existing_book_ids(book_ids)
+        page_ids, total, last_page, page, has_next = paginate_books(existing_ids, page, limit)
+        paginated = await get_book_previews_by_ids(page_ids)
 
     return PaginatedBookPreviewListResponse(
         code=SUCCESS,
         message="Books retrieved successfully",
-        books=previews,
+        books=paginated,
         total=total,
         page=page,
         last_page=last_page,
@@ -2,9 +2,9 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from internal.tokens.tokens import create_password_reset_token, verify_password_reset_token
-from internal.utils.email import send_reset_password_email
-from internal.utils.utils import hash_password
-from internal.database.users import get_user_by_email, get_user_by_id, update_user
+from internal.utils.email import queue_reset_password_email
+from internal.utils.passwords import hash_password
+from internal.database.users import get_user_by_email, get_user_by_id, save_user
 from internal.types.types import ResetPasswordRequest, EmailRequest, FAIL, SUCCESS
 from internal.types.responses import SuccessResponse, FailResponse
 
@@ -24,8 +24,8 @@ async def forgot_password(request_body: EmailRequest):
         )
 
     token = create_password_reset_token(user.id)
-    success = await send_reset_password_email(user=user, token=token)
-    if not success:
+    queued = queue_reset_password_email(user=user, token=token)
+    if not queued:
         return JSONResponse(
             status_code=500,
             content=jsonable_encoder(FailResponse(
@@ -36,7 +36,7 @@ async def forgot_password(request_body: EmailRequest):
 
     return SuccessResponse(
         code=SUCCESS,
-        message="Password reset link has been sent successfully."
+        message="Password reset link is on its way, please check your email."
     )
 
 
@@ -62,8 +62,8 @@ async def reset_password(request_body: ResetPasswordRequest):
             ))
         )
 
-    user.password = hash_password(request_body.new_password)
-    success = await update_user(user)
+    user.password = await hash_password(request_body.new_password)
+    success = await save_user(user)
 
     if not success:
         return JSONResponse(
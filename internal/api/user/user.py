@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from internal.utils.utils import hash_password, get_current_user
+from internal.utils.utils import get_current_user, get_current_user_principal
+from internal.utils.passwords import hash_password, verify_password
 from internal.database.admins import get_admin_by_email, get_admin_by_username
-from internal.database.users import get_user_by_id, update_user, get_user_by_username, get_user_by_email
+from internal.database.users import get_user_by_id, save_user, get_user_by_username, get_user_by_email
 from internal.types.responses import FailResponse, PublicUserResponse
 from internal.types.types import SUCCESS, FAIL, UserUpdateRequest
 from internal.models.user import User, PublicUser
+from internal.models.principal import Principal
 
 router = APIRouter()
 
@@ -31,8 +33,8 @@ async def get_current_user_info(user: User = Depends(get_current_user)):
 
 
 @router.patch("/me", response_model=PublicUserResponse)
-async def update_user_info(update_data: UserUpdateRequest, user: User = Depends(get_current_user)):
-    user = await get_user_by_id(user.id)
+async def update_user_info(update_data: UserUpdateRequest, principal: Principal = Depends(get_current_user_principal)):
+    user = await get_user_by_id(principal.id)
     if not user:
         return JSONResponse(status_code=404, content=jsonable_encoder(
             FailResponse(
@@ -68,12 +70,12 @@ async def update_user_info(update_data: UserUpdateRequest, user: User = Depends(
         user.email = update_data.email
         isUpdated = True
 
-    if update_data.password and not user.check_password(update_data.password):
-        user.password = hash_password(update_data.password)
+    if update_data.password and not await verify_password(update_data.password, user.password):
+        user.password = await hash_password(update_data.password)
         isUpdated = True
 
     if isUpdated:
-        updated = await update_user(user)
+        updated = await save_user(user)
         if not updated:
             return JSONResponse(status_code=500, content=jsonable_encoder(
                 FailResponse(
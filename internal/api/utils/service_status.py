@@ -1,9 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from internal.types.responses import SuccessResponse, FailResponse
 from internal.types.types import SUCCESS, FAIL
-from internal.types.responses import VersionResponse
+from internal.types.responses import VersionResponse, MetricsResponse
+from internal.utils.mail_queue import mail_queue
+from internal.utils.google_books import google_books_cache_metrics
+from internal.utils.utils import auth_cache_metrics, get_current_admin_principal
+from internal.database.users import principal_cache_metrics
+from internal.utils.passwords import password_hasher
 from config.config import get_config, VERSION
 
 router = APIRouter()
@@ -49,3 +54,19 @@ def api_ready():
             message="Service is not ready"
         ))
     )
+
+
+# Exposes queue, cache and worker pool internals, so it is restricted to admins
+@router.get("/metrics", response_model=MetricsResponse, summary="Get runtime metrics of the service")
+def api_metrics(admin=Depends(get_current_admin_principal)):
+    return MetricsResponse(
+        code=SUCCESS,
+        message="Successfully retrieved metrics",
+        metrics={
+            "mail_queue": mail_queue.metrics(),
+            "google_books_cache": google_books_cache_metrics(),
+            "token_cache": auth_cache_metrics(),
+            "principal_cache": principal_cache_metrics(),
+            "password_hasher": password_hasher.metrics(),
+        }
+    )
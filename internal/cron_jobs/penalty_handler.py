@@ -1,55 +1,118 @@
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import time
 from datetime import datetime
-from internal.database.books import get_all_borrowed_books, get_book_by_id, update_book
-from internal.database.users import get_user_by_id, update_user
+from typing import Any, Dict, List
+from pymongo import UpdateOne, UpdateMany
+from internal.database.database import books_collection, users_collection
+from internal.database.dashboard import invalidate_dashboard_snapshot
+from internal.database.users import invalidate_cached_users
 from internal.models.user import BookPenalty
+from internal.utils.logger import logger
 from config.config import get_config
 
+PENALTY_BATCH_SIZE = 500
 
-async def check_penalties():
-    now = datetime.now()
-    borrowed_books = await get_all_borrowed_books()
 
-    penalty_per_day = get_config("penalty_amount")
+async def _apply_penalty_batch(overdue_books: List[Dict[str, Any]], now: datetime, penalty_per_day: float) -> Dict[str, int]:
+    user_ids = list({doc["currently_borrowed_by"] for doc in overdue_books})
+    users_cursor = users_collection.find({"_id": {"$in": user_ids}}, {"penalties.book_id": 1})
+    existing_penalties = {
+        doc["_id"]: {p.get("book_id") for p in doc.get("penalties") or []}
+        async for doc in users_cursor
+    }
 
-    for book in borrowed_books:
-        if not book.return_date or book.return_date > now:
-            continue
+    user_operations = []
+    penalized_book_ids = []
+    penalized_user_ids = set()
 
-        user = await get_user_by_id(book.currently_borrowed_by)
-        if not user:
+    for doc in overdue_books:
+        book_id = doc["_id"]
+        user_id = doc["currently_borrowed_by"]
+        if user_id not in existing_penalties:
             continue
 
-        overdue_days = (now - book.return_date).days
+        overdue_days = (now - doc["return_date"]).days
         if overdue_days <= 0:
             continue
 
         total_penalty = overdue_days * penalty_per_day
 
-        if not user.penalties:
-            user.penalties = []
-
-        existing_penalty = next((p for p in user.penalties if p.book_id == book.id), None)
-        if existing_penalty:
-            existing_penalty.amount = total_penalty
+        if book_id in existing_penalties[user_id]:
+            user_operations.append(UpdateOne(
+                {"_id": user_id},
+                {
+                    "$set": {"penalties.$[penalty].amount": total_penalty},
+                    "$addToSet": {"overdue_books": book_id},
+                },
+                array_filters=[{"penalty.book_id": book_id}]
+            ))
         else:
-            user.penalties.append(BookPenalty(book_id=book.id, amount=total_penalty))
+            # Guard against a penalty for the same book being pushed twice
+            user_operations.append(UpdateOne(
+                {"_id": user_id, "penalties.book_id": {"$ne": book_id}},
+                {
+                    "$push": {"penalties": BookPenalty(book_id=book_id, amount=total_penalty).model_dump()},
+                    "$addToSet": {"overdue_books": book_id},
+                }
+            ))
+        penalized_book_ids.append(book_id)
+        penalized_user_ids.add(user_id)
+
+    if user_operations:
+        await users_collection.bulk_write(user_operations, ordered=False)
+        invalidate_cached_users(list(penalized_user_ids))
+    if penalized_book_ids:
+        await books_collection.bulk_write([UpdateMany(
+            {"_id": {"$in": penalized_book_ids}, "has_penalty": {"$ne": True}},
+            {"$set": {"has_penalty": True}}
+        )])
+
+    return {"penalties": len(user_operations), "users": len(penalized_user_ids)}
+
 
-        if not user.overdue_books:
-            user.overdue_books = []
+async def check_penalties() -> Dict[str, Any]:
+    started = time.monotonic()
+    now = datetime.now()
+    penalty_per_day = get_config("penalty_amount")
+
+    processed_books = 0
+    applied_penalties = 0
+    affected_users = 0
+
+    # Only overdue loans are streamed, in batches, with the fields the job needs
+    books_cursor = books_collection.find(
+        {"borrowed": True, "return_date": {"$lt": now}, "currently_borrowed_by": {"$ne": None}},
+        {"currently_borrowed_by": 1, "return_date": 1}
+    ).batch_size(PENALTY_BATCH_SIZE)
+
+    batch: List[Dict[str, Any]] = []
+    async for doc in books_cursor:
+        batch.append(doc)
+        if len(batch) < PENALTY_BATCH_SIZE:
+            continue
 
-        if book.id not in user.overdue_books:
-            user.overdue_books.append(book.id)
+        counts = await _apply_penalty_batch(batch, now, penalty_per_day)
+        processed_books += len(batch)
+        applied_penalties += counts["penalties"]
+        affected_users += counts["users"]
+        batch = []
 
-        book = await get_book_by_id(book.id)
-        if book and not book.has_penalty:
-            book.has_penalty = True
+    if batch:
+        counts = await _apply_penalty_batch(batch, now, penalty_per_day)
+        processed_books += len(batch)
+        applied_penalties += counts["penalties"]
+        affected_users += counts["users"]
 
-        await update_user(user)
-        await update_book(book)
+    invalidate_dashboard_snapshot()
 
+    report = {
+        "processed_books": processed_books,
+        "applied_penalties": applied_penalties,
+        "affected_users": affected_users,
+        "duration_seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        f"Penalty check processed {processed_books} overdue books, applied {applied_penalties} penalties "
+        f"to {affected_users} users in {report['duration_seconds']}s"
+    )
+    return report
 
-def start_cron_jobs():
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(check_penalties, 'cron', hour=0, minute=0)
-    scheduler.start()
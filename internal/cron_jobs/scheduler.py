@@ -0,0 +1,14 @@
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from internal.cron_jobs.penalty_handler import check_penalties
+from internal.database.requests import rebuild_acquisition_queue
+from internal.jobs.related_books import refresh_all_related_books
+
+
+def start_cron_jobs():
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(check_penalties, 'cron', hour=0, minute=0)
+    # Borrow co-occurrence is only picked up by the nightly rebuild
+    scheduler.add_job(refresh_all_related_books, 'cron', hour=3, minute=0)
+    # Reconciles the incrementally maintained acquisition queue with the requests
+    scheduler.add_job(rebuild_acquisition_queue, 'cron', hour=3, minute=30)
+    scheduler.start()
@@ -0,0 +1,55 @@
+from typing import Any, Dict, List, Optional
+from isbnlib import canonical, is_isbn10, to_isbn13
+from pymongo import ASCENDING, DESCENDING
+from internal.database.database import acquisition_queue_collection
+from internal.models.request import AcquisitionItem
+from internal.search.ngram_index import normalize
+
+# Most requested first, older demand breaks ties
+ACQUISITION_SORT = [("requester_count", DESCENDING), ("first_requested_at", ASCENDING), ("_id", ASCENDING)]
+
+
+def acquisition_key(isbn: Optional[str], title: Optional[str]) -> str:
+    # Editions requested through different Google volumes share an ISBN-13
+    digits = canonical(isbn) if isbn else ""
+    if digits:
+        return f"isbn:{to_isbn13(digits) if is_isbn10(digits) else digits}"
+    return f"title:{normalize(title or '')}"
+
+
+async def add_demand(request: Dict[str, Any], requesters: int):
+    await acquisition_queue_collection.update_one(
+        {"_id": request["acquisition_key"]},
+        {
+            "$inc": {"requester_count": requesters},
+            "$addToSet": {"request_ids": request["_id"]},
+            "$min": {"first_requested_at": request["requested_at"]},
+            "$setOnInsert": {
+                "title": request.get("title") or "",
+                "authors": request.get("authors") or [],
+                "isbn": request.get("isbn"),
+                "cover_image": request.get("cover_image")
+            }
+        },
+        upsert=True
+    )
+
+
+async def remove_demand(request: Dict[str, Any], requesters: int, drop_request: bool = False):
+    update: Dict[str, Any] = {"$inc": {"requester_count": -requesters}}
+    if drop_request:
+        update["$pull"] = {"request_ids": request["_id"]}
+
+    key = request["acquisition_key"]
+    await acquisition_queue_collection.update_one({"_id": key}, update)
+    await acquisition_queue_collection.delete_one({"_id": key, "requester_count": {"$lte": 0}})
+
+
+async def get_acquisition_items(skip: int, limit: int) -> List[AcquisitionItem]:
+    cursor = acquisition_queue_collection.find({}).sort(ACQUISITION_SORT).skip(skip).limit(limit)
+    return [AcquisitionItem(key=doc.pop("_id"), **doc) async for doc in cursor]
+
+
+async def count_acquisition_items() -> int:
+    # Collection metadata, so the count does not scan the queue
+    return await acquisition_queue_collection.estimated_document_count()
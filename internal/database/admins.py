@@ -1,5 +1,8 @@
 from internal.database.database import admins_collection
 from internal.models.admin import Admin
+from internal.models.principal import Principal
+from internal.utils.cache import TTLCache
+from config.config import get_config
 from pymongo.errors import DuplicateKeyError
 from typing import Optional
 from bson import ObjectId
@@ -21,6 +24,36 @@ async def get_admin_by_id(admin_id: str) -> Optional[Admin]:
     return Admin(**admin_data) if admin_data else None
 
 
+_admin_cache = TTLCache(maxsize=get_config("auth_cache_size"), ttl=get_config("auth_cache_ttl"))
+_principal_cache = TTLCache(maxsize=get_config("auth_cache_size"), ttl=get_config("auth_cache_ttl"))
+
+
+async def get_cached_admin_by_id(admin_id: str) -> Optional[Admin]:
+    admin_data = _admin_cache.get(admin_id)
+    if admin_data is None:
+        admin_data = await admins_collection.find_one({"_id": admin_id})
+        if not admin_data:
+            return None
+        _admin_cache.set(admin_id, admin_data)
+    return Admin(**admin_data)
+
+
+async def get_admin_principal(admin_id: str) -> Optional[Principal]:
+    principal = _principal_cache.get(admin_id)
+    if principal is None:
+        admin_data = await admins_collection.find_one({"_id": admin_id}, {"role": 1})
+        if not admin_data:
+            return None
+        principal = Principal(id=admin_data["_id"], role=admin_data["role"])
+        _principal_cache.set(admin_id, principal)
+    return principal
+
+
+def invalidate_cached_admin(admin_id: str):
+    _admin_cache.pop(admin_id)
+    _principal_cache.pop(admin_id)
+
+
 async def get_admin_by_email(email: str) -> Optional[Admin]:
     admin_data = await admins_collection.find_one({"email": email})
     return Admin(**admin_data) if admin_data else None
@@ -36,9 +69,11 @@ async def update_admin(admin: Admin) -> bool:
     result = await admins_collection.update_one(
         {"_id": admin.id}, {"$set": admin_data}
     )
+    invalidate_cached_admin(admin.id)
     return result.modified_count > 0
 
 
 async def delete_admin(admin_id: str) -> bool:
     result = await admins_collection.delete_one({"_id": ObjectId(admin_id)})
+    invalidate_cached_admin(admin_id)
     return result.deleted_count > 0
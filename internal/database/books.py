@@ -1,7 +1,12 @@
 from internal.database.database import books_collection
-from internal.database.users import users_collection
-from internal.models.book import Book
-from typing import Optional, List
+from internal.database.users import users_collection, clear_cached_users, invalidate_cached_user
+from internal.models.book import Book, BookPreview, BorrowedBookPreview
+from internal.search.book_index import index_book, unindex_book
+from internal.jobs.related_books import schedule_related_refresh, schedule_related_removal
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from typing import Optional, List, Dict, Any, Set, Tuple
+import re
 
 
 async def create_book(book: Book) -> Optional[Book]:
@@ -14,12 +19,44 @@ async def create_book(book: Book) -> Optional[Book]:
         return None
 
     book_data = book.model_dump(by_alias=True)
-    result = await books_collection.insert_one(book_data)
+    try:
+        result = await books_collection.insert_one(book_data)
+    except DuplicateKeyError:
+        return None
     if result.inserted_id:
+        index_book(book)
+        schedule_related_refresh([book.id])
         return book
     return None
 
 
+async def create_books(books: List[Book]) -> List[Book]:
+    if not books:
+        return []
+
+    # Unordered inserts keep going past duplicate ISBNs and report them at the end
+    failed_indexes = set()
+    try:
+        await books_collection.insert_many(
+            [book.model_dump(by_alias=True) for book in books],
+            ordered=False
+        )
+    except BulkWriteError as e:
+        failed_indexes = {error["index"] for error in e.details.get("writeErrors", [])}
+
+    created = [book for index, book in enumerate(books) if index not in failed_indexes]
+    for book in created:
+        index_book(book)
+    schedule_related_refresh([book.id for book in created])
+    return created
+
+
+async def get_existing_isbns(isbns: List[str]) -> Set[str]:
+    if not isbns:
+        return set()
+    return set(await books_collection.distinct("isbn", {"isbn": {"$in": isbns}}))
+
+
 async def get_book_by_id(book_id: str) -> Optional[Book]:
     book_data = await books_collection.find_one({"_id": book_id})
     return Book(**book_data) if book_data else None
@@ -30,6 +67,171 @@ async def get_book_by_isbn(isbn: str) -> Optional[Book]:
     return Book(**book_data) if book_data else None
 
 
+# Fields mirrored by the in-process catalog indexes
+INDEXED_FIELDS = {"title", "authors", "categories", "publisher", "language"}
+
+
+def _exact_match_ci(value: str) -> Dict[str, Any]:
+    return {"$regex": f"^{re.escape(value)}$", "$options": "i"}
+
+
+def build_books_query(
+    book_ids: Optional[List[str]] = None,
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    language: Optional[str] = None,
+    available_only: bool = False,
+    borrowed_only: bool = False,
+    max_page_count: Optional[int] = None,
+) -> Dict[str, Any]:
+    conditions: List[Dict[str, Any]] = []
+
+    if book_ids is not None:
+        conditions.append({"_id": {"$in": book_ids}})
+    if available_only:
+        conditions.append({"borrowed": False})
+    if borrowed_only:
+        conditions.append({"borrowed": True})
+    if max_page_count:
+        # Books without a page count are never excluded by this filter
+        conditions.append({"$or": [
+            {"page_count": None},
+            {"page_count": {"$lte": max_page_count}},
+        ]})
+    if language:
+        conditions.append({"language": _exact_match_ci(language)})
+    if category:
+        conditions.append({"categories": {"$elemMatch": {"category": _exact_match_ci(category)}}})
+    if subcategory:
+        conditions.append({"categories": {"$elemMatch": {"subcategory": _exact_match_ci(subcategory)}}})
+
+    if not conditions:
+        return {}
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+POPULARITY_SORT = [("borrow_count", DESCENDING), ("added_at", DESCENDING), ("_id", ASCENDING)]
+
+
+def build_books_sort(most_borrowed: bool = False, recently_added: bool = False) -> List[Tuple[str, int]]:
+    if most_borrowed:
+        return [("borrow_count", DESCENDING), ("_id", ASCENDING)]
+    if recently_added:
+        return [("added_at", DESCENDING), ("_id", ASCENDING)]
+    return [("_id", ASCENDING)]
+
+
+PREVIEW_PROJECTION = {field: 1 for field in BookPreview.model_fields if field != "id"}
+
+
+def _preview_from_document(doc: Dict[str, Any]) -> BookPreview:
+    fields = {key: value for key, value in doc.items() if key != "_id"}
+    return BookPreview(id=doc["_id"], **fields)
+
+
+async def get_book_previews(
+    query: Dict[str, Any],
+    sort: Optional[List[Tuple[str, int]]] = None,
+    skip: int = 0,
+    limit: int = 0
+) -> List[BookPreview]:
+    books_cursor = books_collection.find(query, PREVIEW_PROJECTION)
+    if sort:
+        books_cursor = books_cursor.sort(sort)
+    if skip:
+        books_cursor = books_cursor.skip(skip)
+    if limit:
+        books_cursor = books_cursor.limit(limit)
+    return [_preview_from_document(doc) async for doc in books_cursor]
+
+
+async def get_book_preview_by_isbn(isbn: str) -> Optional[BookPreview]:
+    book_data = await books_collection.find_one({"isbn": isbn}, PREVIEW_PROJECTION)
+    return _preview_from_document(book_data) if book_data else None
+
+
+async def get_books_by_ids(
+    book_ids: List[str],
+    projection: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    if not book_ids:
+        return []
+
+    books_cursor = books_collection.find({"_id": {"$in": list(set(book_ids))}}, projection)
+    docs = {doc["_id"]: doc async for doc in books_cursor}
+
+    # Keep the caller's ordering, skipping IDs that no longer exist
+    return [docs[book_id] for book_id in book_ids if book_id in docs]
+
+
+async def get_book_previews_by_ids(book_ids: List[str]) -> List[BookPreview]:
+    docs = await get_books_by_ids(book_ids, PREVIEW_PROJECTION)
+    return [_preview_from_document(doc) for doc in docs]
+
+
+BORROWED_QUERY = {"borrowed": True, "currently_borrowed_by": {"$ne": None}}
+BORROWED_SORT = [("return_date", ASCENDING), ("_id", ASCENDING)]
+BORROWED_PREVIEW_PROJECTION = {
+    field: 1 for field in BorrowedBookPreview.model_fields
+    if field not in ("id", "currently_borrowed_by_username")
+}
+
+
+async def get_borrowed_book_previews(
+    query: Dict[str, Any],
+    skip: int = 0,
+    limit: int = 0
+) -> List[BorrowedBookPreview]:
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": query},
+        {"$sort": dict(BORROWED_SORT)},
+    ]
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit:
+        pipeline.append({"$limit": limit})
+
+    # Usernames are joined only for the rows being returned
+    pipeline += [
+        {"$lookup": {
+            "from": users_collection.name,
+            "localField": "currently_borrowed_by",
+            "foreignField": "_id",
+            "as": "borrower",
+        }},
+        {"$project": {
+            **BORROWED_PREVIEW_PROJECTION,
+            "currently_borrowed_by_username": {"$arrayElemAt": ["$borrower.username", 0]},
+        }},
+    ]
+
+    docs = await books_collection.aggregate(pipeline).to_list(length=None)
+    return [
+        BorrowedBookPreview(id=doc["_id"], **{key: value for key, value in doc.items() if key != "_id"})
+        for doc in docs
+    ]
+
+
+async def get_borrowed_book_candidates(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    projection = {"title": 1, "isbn": 1, "authors": 1, "publisher": 1}
+    books_cursor = books_collection.find(query, projection).sort(BORROWED_SORT)
+    return [doc async for doc in books_cursor]
+
+
+async def get_existing_book_ids(book_ids: List[str]) -> List[str]:
+    if not book_ids:
+        return []
+
+    existing = set(await books_collection.distinct("_id", {"_id": {"$in": list(set(book_ids))}}))
+    return [book_id for book_id in book_ids if book_id in existing]
+
+
+async def count_books(query: Dict[str, Any]) -> int:
+    return await books_collection.count_documents(query)
+
+
 async def get_all_books() -> List[Book]:
     books_cursor = books_collection.find()
     books = [Book(**doc) async for doc in books_cursor]
@@ -42,12 +244,25 @@ async def get_all_borrowed_books() -> List[Book]:
     return books
 
 
-async def update_book(book: Book) -> bool:
-    book_data = book.model_dump(by_alias=True)
-    result = await books_collection.update_one(
-        {"_id": book.id}, {"$set": book_data}
-    )
-    return result.modified_count > 0
+async def save_book(
+    book: Book,
+    push: Optional[Dict[str, Any]] = None,
+    pull: Optional[Dict[str, Any]] = None,
+    add_to_set: Optional[Dict[str, Any]] = None,
+) -> bool:
+    update = book.build_update(push=push, pull=pull, add_to_set=add_to_set)
+    if not update:
+        return True
+
+    result = await books_collection.update_one({"_id": book.id}, update)
+    if result.matched_count == 0:
+        return False
+
+    if book.dirty_fields & INDEXED_FIELDS:
+        index_book(book)
+        schedule_related_refresh([book.id])
+    book.mark_clean()
+    return True
 
 
 async def get_borrowed_books_count() -> int:
@@ -64,19 +279,61 @@ async def get_books_count() -> int:
 
 async def delete_book(book_id: str) -> bool:
     result = await books_collection.delete_one({"_id": book_id})
+    if result.deleted_count > 0:
+        unindex_book(book_id)
+        schedule_related_removal(book_id)
     return result.deleted_count > 0
 
 
 async def delete_book_by_id(book_id: str) -> bool:
     result = await books_collection.delete_one({"_id": book_id})
+    if result.deleted_count > 0:
+        unindex_book(book_id)
+        schedule_related_removal(book_id)
     return result.deleted_count > 0
 
 
-async def remove_book_from_notify_lists(book_id: str):
+async def delete_books_by_ids(book_ids: List[str]) -> int:
+    if not book_ids:
+        return 0
+
+    existing = await books_collection.distinct("_id", {"_id": {"$in": book_ids}})
+    result = await books_collection.delete_many({"_id": {"$in": existing}})
+    for book_id in existing:
+        unindex_book(book_id)
+        schedule_related_removal(book_id)
+    return result.deleted_count
+
+
+async def remove_book_references(book_ids: List[str], exclude_user_id: Optional[str] = None):
+    if not book_ids:
+        return
+
+    # One statement for every user instead of a read and a write per user
+    query: Dict[str, Any] = {"$or": [
+        {"borrowed_books": {"$in": book_ids}},
+        {"overdue_books": {"$in": book_ids}},
+        {"borrowed_history": {"$in": book_ids}},
+        # Implies the with_penalties partial index filter, so the clause can use that index
+        {"penalties.0": {"$exists": True}, "penalties.book_id": {"$in": book_ids}},
+        {"notify_me_list": {"$in": book_ids}},
+    ]}
+    if exclude_user_id:
+        query["_id"] = {"$ne": exclude_user_id}
+
     await users_collection.update_many(
-        {"notify_me_list": book_id},
-        {"$pull": {"notify_me_list": book_id}}
+        query,
+        {
+            "$pull": {
+                "borrowed_books": {"$in": book_ids},
+                "overdue_books": {"$in": book_ids},
+                "borrowed_history": {"$in": book_ids},
+                "penalties": {"book_id": {"$in": book_ids}},
+                "notify_me_list": {"$in": book_ids}
+            }
+        }
     )
+    clear_cached_users()
 
 
 async def clear_books_from_user(user_id: str, book_ids: List[str]) -> None:
@@ -93,3 +350,4 @@ async def clear_books_from_user(user_id: str, book_ids: List[str]) -> None:
             }
         }
     )
+    invalidate_cached_user(user_id)
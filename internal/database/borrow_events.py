@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from internal.database.database import borrow_events_collection
+from internal.utils.cache import utcnow
+
+
+async def record_borrow_event(book_id: str, user_id: str, session: Optional[Any] = None):
+    # Event times are UTC, the retention TTL index expires them against UTC
+    await borrow_events_collection.insert_one(
+        {"book_id": book_id, "user_id": user_id, "borrowed_at": utcnow()},
+        session=session
+    )
+
+
+async def get_popular_book_ids_since(since: datetime, limit: int) -> List[Tuple[str, int]]:
+    pipeline = [
+        {"$match": {"borrowed_at": {"$gte": since}}},
+        {"$group": {"_id": "$book_id", "borrows": {"$sum": 1}, "last_borrowed_at": {"$max": "$borrowed_at"}}},
+        {"$sort": {"borrows": -1, "last_borrowed_at": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    return [(doc["_id"], doc["borrows"]) async for doc in borrow_events_collection.aggregate(pipeline)]
+
+
+async def convert_borrow_events_to_utc() -> int:
+    # Events logged before the switch carry the server's local time
+    offset = utcnow() - datetime.now()
+    result = await borrow_events_collection.update_many(
+        {},
+        [{"$set": {"borrowed_at": {"$add": ["$borrowed_at", int(offset.total_seconds() * 1000)]}}}]
+    )
+    return result.modified_count
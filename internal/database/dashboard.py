@@ -0,0 +1,62 @@
+from typing import Any, Dict
+from internal.database.database import books_collection
+from internal.utils.cache import TTLCache
+
+DASHBOARD_SNAPSHOT_TTL = 30
+
+_dashboard_cache = TTLCache(maxsize=1, ttl=DASHBOARD_SNAPSHOT_TTL)
+
+DASHBOARD_PIPELINE = [
+    {"$facet": {
+        "books": [
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "borrowed": {"$sum": {"$cond": ["$borrowed", 1, 0]}},
+                "penalty": {"$sum": {"$cond": ["$has_penalty", 1, 0]}},
+            }},
+        ],
+    }},
+    # Uncorrelated lookup so users are summarized in the same round trip
+    {"$lookup": {
+        "from": "users",
+        "pipeline": [
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "penalty": {"$sum": {"$cond": [
+                    {"$gt": [{"$size": {"$ifNull": ["$penalties", []]}}, 0]}, 1, 0
+                ]}},
+                "penalty_fee": {"$sum": {"$sum": "$penalties.amount"}},
+            }},
+        ],
+        "as": "users",
+    }},
+]
+
+
+async def get_dashboard_stats() -> Dict[str, Any]:
+    snapshot = _dashboard_cache.get("dashboard")
+    if snapshot is not None:
+        return snapshot
+
+    result = await books_collection.aggregate(DASHBOARD_PIPELINE).to_list(length=1)
+    facets = result[0] if result else {}
+    books = (facets.get("books") or [{}])[0]
+    users = (facets.get("users") or [{}])[0]
+
+    snapshot = {
+        "borrowed_books_count": books.get("borrowed", 0),
+        "penalty_books_count": books.get("penalty", 0),
+        "penalty_users_count": users.get("penalty", 0),
+        "total_books_count": books.get("total", 0),
+        "available_books_count": books.get("total", 0) - books.get("borrowed", 0),
+        "total_users_count": users.get("total", 0),
+        "total_penalty_fee": users.get("penalty_fee", 0),
+    }
+    _dashboard_cache.set("dashboard", snapshot)
+    return snapshot
+
+
+def invalidate_dashboard_snapshot():
+    _dashboard_cache.clear()
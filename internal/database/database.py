@@ -10,6 +10,14 @@ database = client[DB_NAME]
 users_collection = database["users"]
 admins_collection = database["admins"]
 books_collection = database["books"]
+migrations_collection = database["schema_migrations"]
+google_books_cache_collection = database["google_books_cache"]
+jobs_collection = database["jobs"]
+related_books_collection = database["related_books"]
+borrow_events_collection = database["borrow_events"]
+book_requests_collection = database["book_requests"]
+book_requesters_collection = database["book_requesters"]
+acquisition_queue_collection = database["acquisition_queue"]
 
 
 async def check_connection():
@@ -0,0 +1,157 @@
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from internal.database.database import database, migrations_collection
+from internal.utils.logger import logger
+from config.config import get_config
+
+# Bump whenever INDEX_SPECS changes so existing deployments get re-provisioned
+INDEX_VERSION = 9
+
+# Matches "Alice" and "alice" alike, queries must pass the same collation to use these indexes
+CASE_INSENSITIVE_COLLATION = {"locale": "en", "strength": 2}
+
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    "books": [
+        IndexModel(
+            [("isbn", ASCENDING)], name="isbn_unique", unique=True,
+            partialFilterExpression={"isbn": {"$type": "string"}}
+        ),
+        IndexModel([("borrowed", ASCENDING), ("return_date", ASCENDING)], name="borrowed_return_date"),
+        IndexModel([("has_penalty", ASCENDING)], name="has_penalty"),
+        IndexModel([("added_at", DESCENDING)], name="added_at"),
+        IndexModel(
+            [("borrow_count", DESCENDING), ("added_at", DESCENDING), ("_id", ASCENDING)],
+            name="borrow_count_added_at"
+        ),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_ci", collation=CASE_INSENSITIVE_COLLATION),
+        IndexModel([("username", ASCENDING)], name="username_ci", collation=CASE_INSENSITIVE_COLLATION),
+        IndexModel([("banned", ASCENDING), ("_id", ASCENDING)], name="banned"),
+        IndexModel(
+            [("penalties.book_id", ASCENDING)], name="with_penalties",
+            partialFilterExpression={"penalties.0": {"$exists": True}}
+        ),
+        IndexModel([("notify_me_list", ASCENDING)], name="notify_me_list"),
+        IndexModel([("borrowed_books", ASCENDING)], name="borrowed_books"),
+        IndexModel([("overdue_books", ASCENDING)], name="overdue_books"),
+        IndexModel([("borrowed_history", ASCENDING)], name="borrowed_history"),
+    ],
+    "admins": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "jobs": [
+        IndexModel([("type", ASCENDING), ("status", ASCENDING)], name="type_status"),
+    ],
+    "book_requests": [
+        IndexModel([("status", ASCENDING), ("requested_at", ASCENDING)], name="status_requested_at"),
+        IndexModel([("isbn", ASCENDING)], name="isbn"),
+        IndexModel([("acquisition_key", ASCENDING)], name="acquisition_key"),
+    ],
+    "book_requesters": [
+        IndexModel([("user_id", ASCENDING), ("requested_at", ASCENDING)], name="user_requested_at"),
+        IndexModel([("request_id", ASCENDING), ("requested_at", ASCENDING)], name="request_requested_at"),
+    ],
+    "acquisition_queue": [
+        IndexModel(
+            [("requester_count", DESCENDING), ("first_requested_at", ASCENDING), ("_id", ASCENDING)],
+            name="demand_age"
+        ),
+    ],
+    "borrow_events": [
+        IndexModel(
+            [("borrowed_at", ASCENDING)], name="borrowed_at_ttl",
+            expireAfterSeconds=get_config("borrow_event_retention_days") * 24 * 3600
+        ),
+    ],
+    "related_books": [
+        IndexModel([("related", ASCENDING)], name="related"),
+    ],
+    "google_books_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Index options that must match for an existing index to be considered up to date
+COMPARED_OPTIONS = ("unique", "partialFilterExpression", "expireAfterSeconds", "collation")
+
+
+def _describe_difference(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    differences = []
+
+    expected_key = list(expected["key"].items())
+    actual_key = [(field, direction) for field, direction in actual.get("key", [])]
+    if expected_key != actual_key:
+        differences.append(f"key {actual_key} != {expected_key}")
+
+    for option in COMPARED_OPTIONS:
+        expected_value = expected.get(option)
+        actual_value = actual.get(option)
+        if option == "unique":
+            expected_value, actual_value = bool(expected_value), bool(actual_value)
+        if option == "collation" and expected_value and actual_value:
+            actual_value = {k: actual_value[k] for k in expected_value if k in actual_value}
+        if expected_value != actual_value:
+            differences.append(f"{option} {actual_value!r} != {expected_value!r}")
+
+    return differences
+
+
+async def verify_indexes() -> Dict[str, List[str]]:
+    report: Dict[str, List[str]] = {"missing": [], "different": []}
+
+    for collection_name, models in INDEX_SPECS.items():
+        existing = await database[collection_name].index_information()
+        for model in models:
+            spec = model.document
+            name = f"{collection_name}.{spec['name']}"
+            actual = existing.get(spec["name"])
+            if actual is None:
+                report["missing"].append(name)
+                continue
+
+            differences = _describe_difference(spec, actual)
+            if differences:
+                report["different"].append(f"{name} ({'; '.join(differences)})")
+
+    return report
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    state = await migrations_collection.find_one({"_id": "indexes"})
+    current_version = state.get("version", 0) if state else 0
+
+    report = await verify_indexes()
+    if current_version >= INDEX_VERSION and not report["missing"]:
+        for entry in report["different"]:
+            logger.warning(f"Index differs from the expected definition: {entry}")
+        return report
+
+    failed = False
+    for collection_name, models in INDEX_SPECS.items():
+        for model in models:
+            try:
+                await database[collection_name].create_indexes([model])
+            except OperationFailure as e:
+                # Conflicting definitions and duplicate keys are reported, not fatal
+                failed = True
+                logger.error(f"Failed to create index {collection_name}.{model.document['name']}: {e}")
+
+    report = await verify_indexes()
+    for entry in report["missing"]:
+        logger.warning(f"Index is missing: {entry}")
+    for entry in report["different"]:
+        logger.warning(f"Index differs from the expected definition: {entry}")
+
+    if not failed:
+        await migrations_collection.update_one(
+            {"_id": "indexes"},
+            {"$set": {"version": INDEX_VERSION}},
+            upsert=True
+        )
+
+    return report
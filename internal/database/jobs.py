@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from internal.database.database import jobs_collection
+from internal.models.job import Job, JobStatus
+
+
+async def create_job(job: Job) -> Job:
+    await jobs_collection.insert_one(job.model_dump(by_alias=True))
+    return job
+
+
+async def get_job_by_id(job_id: str) -> Optional[Job]:
+    job_data = await jobs_collection.find_one({"_id": job_id})
+    return Job(**job_data) if job_data else None
+
+
+async def get_jobs_by_status(job_type: str, status: JobStatus) -> List[Job]:
+    cursor = jobs_collection.find({"type": job_type, "status": status.value})
+    return [Job(**doc) async for doc in cursor]
+
+
+async def set_job_status(job_id: str, status: JobStatus, error: Optional[str] = None) -> bool:
+    now = datetime.now()
+    fields: Dict[str, Any] = {"status": status.value, "error": error, "updated_at": now}
+    if status in (JobStatus.COMPLETED, JobStatus.FAILED):
+        fields["finished_at"] = now
+
+    result = await jobs_collection.update_one({"_id": job_id}, {"$set": fields})
+    return result.matched_count > 0
+
+
+async def record_job_progress(
+    job_id: str,
+    processed: int = 0,
+    succeeded: int = 0,
+    skipped: int = 0,
+    failed_items: Optional[List[str]] = None,
+    fields: Optional[Dict[str, Any]] = None,
+) -> bool:
+    failed_items = failed_items or []
+    update: Dict[str, Any] = {
+        "$inc": {
+            "processed": processed,
+            "succeeded": succeeded,
+            "skipped": skipped,
+            "failed": len(failed_items),
+        },
+        "$set": {**(fields or {}), "updated_at": datetime.now()},
+    }
+    if failed_items:
+        update["$push"] = {"failed_items": {"$each": failed_items}}
+
+    result = await jobs_collection.update_one({"_id": job_id}, update)
+    return result.matched_count > 0
@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from pymongo import ReturnDocument
+from internal.database.database import client, database, books_collection, users_collection
+from internal.database.dashboard import invalidate_dashboard_snapshot
+from internal.database.users import invalidate_cached_user
+from internal.database.borrow_events import record_borrow_event
+from internal.search.book_index import related_index
+from internal.models.book import Book
+
+_transactions_supported: Optional[bool] = None
+
+
+async def supports_transactions() -> bool:
+    global _transactions_supported
+    if _transactions_supported is None:
+        # Transactions need a replica set member or a mongos router
+        hello = await database.command("hello")
+        _transactions_supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+    return _transactions_supported
+
+
+async def run_in_transaction(operation: Callable[[Any], Awaitable[Any]]) -> Any:
+    if not await supports_transactions():
+        return await operation(None)
+
+    async with await client.start_session() as session:
+        return await session.with_transaction(operation)
+
+
+async def borrow_book_for_user(book_id: str, user_id: str, return_date: datetime) -> Optional[Book]:
+    async def operation(session):
+        now = datetime.now()
+        claim = {
+            "borrowed": True,
+            "currently_borrowed_by": user_id,
+            "borrowed_at": now,
+            "return_date": return_date,
+        }
+        # The guard makes concurrent borrows of the same copy mutually exclusive.
+        # The document before the claim is kept so a manual rollback can restore it.
+        previous = await books_collection.find_one_and_update(
+            {"_id": book_id, "borrowed": False, "currently_borrowed_by": None},
+            {"$set": claim, "$inc": {"borrow_count": 1}},
+            return_document=ReturnDocument.BEFORE,
+            session=session
+        )
+        if not previous:
+            return None
+
+        result = await users_collection.update_one(
+            {"_id": user_id},
+            {"$addToSet": {"borrowed_books": book_id}},
+            session=session
+        )
+        if result.matched_count == 0:
+            # Without a transaction the book claim has to be rolled back by hand
+            await books_collection.update_one(
+                {"_id": book_id, "currently_borrowed_by": user_id},
+                {
+                    "$set": {field: previous.get(field) for field in claim},
+                    "$inc": {"borrow_count": -1},
+                },
+                session=session
+            )
+            return None
+
+        await record_borrow_event(book_id, user_id, session=session)
+        return Book(**{**previous, **claim, "borrow_count": (previous.get("borrow_count") or 0) + 1})
+
+    book = await run_in_transaction(operation)
+    if book:
+        invalidate_dashboard_snapshot()
+        invalidate_cached_user(user_id)
+        related_index.set_popularity(book.id, book.borrow_count)
+    return book
+
+
+async def return_book_for_user(book_id: str, user_id: str, clear_penalties: bool = False) -> Optional[Book]:
+    async def operation(session):
+        book_data = await books_collection.find_one_and_update(
+            {"_id": book_id, "currently_borrowed_by": user_id},
+            {"$set": {
+                "borrowed": False,
+                "currently_borrowed_by": None,
+                "last_borrowed_by": user_id,
+                "return_date": None,
+            }},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if not book_data:
+            return None
+
+        pull = {"borrowed_books": book_id, "overdue_books": book_id}
+        if clear_penalties:
+            pull["penalties"] = {"book_id": book_id}
+
+        await users_collection.update_one(
+            {"_id": user_id},
+            {"$pull": pull, "$addToSet": {"borrowed_history": book_id}},
+            session=session
+        )
+        return Book(**book_data)
+
+    book = await run_in_transaction(operation)
+    if book:
+        invalidate_dashboard_snapshot()
+        invalidate_cached_user(user_id)
+    return book
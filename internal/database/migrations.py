@@ -0,0 +1,98 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from internal.database.database import users_collection, migrations_collection
+from internal.database.requests import save_migrated_requests, count_saved_requests, rebuild_acquisition_queue
+from internal.database.users import clear_cached_users
+from internal.database.borrow_events import convert_borrow_events_to_utc
+from internal.models.request import RequestStatus
+from internal.utils.logger import logger
+
+REQUESTED_BOOKS_BACKUP_FIELD = "requested_books_backup"
+
+
+async def migrate_user_requests() -> int:
+    requests: Dict[str, Dict[str, Any]] = {}
+    requesters: Dict[str, Dict[str, Any]] = {}
+
+    cursor = users_collection.find({"requested_books.0": {"$exists": True}}, {"requested_books": 1})
+    async for user in cursor:
+        for request in user["requested_books"]:
+            request_id = request.get("id")
+            if not request_id:
+                continue
+
+            requester_id = f"{request_id}:{user['_id']}"
+            if requester_id in requesters:
+                continue
+            requesters[requester_id] = {
+                "_id": requester_id,
+                "request_id": request_id,
+                "user_id": user["_id"],
+                "requested_at": request.get("requested_at") or datetime.now()
+            }
+
+            row = requests.get(request_id)
+            if row is None:
+                row = requests[request_id] = {
+                    "title": request.get("title") or "",
+                    "authors": request.get("authors") or [],
+                    "isbn": request.get("isbn"),
+                    "publisher": request.get("publisher"),
+                    "cover_image": request.get("cover_image"),
+                    "status": request.get("status") or RequestStatus.REQUEST_SENT.value,
+                    "requested_at": requesters[requester_id]["requested_at"],
+                    "status_updated_at": request.get("status_updated_at") or requesters[requester_id]["requested_at"],
+                    "requester_count": 0
+                }
+
+            row["requester_count"] += 1
+            row["requested_at"] = min(row["requested_at"], requesters[requester_id]["requested_at"])
+            # Admin updates touched every copy, the most recent one carries the current status
+            status_updated_at = request.get("status_updated_at")
+            if status_updated_at and status_updated_at > row["status_updated_at"]:
+                row["status"] = request.get("status") or row["status"]
+                row["status_updated_at"] = status_updated_at
+
+    await save_migrated_requests(requests, list(requesters.values()))
+
+    # Every copied row has to be readable before the embedded lists are moved aside
+    saved_requests, saved_requesters = await count_saved_requests(list(requests), list(requesters))
+    if saved_requests != len(requests) or saved_requesters != len(requesters):
+        raise RuntimeError(
+            f"Request migration incomplete: {saved_requests}/{len(requests)} requests, "
+            f"{saved_requesters}/{len(requesters)} requesters saved."
+        )
+
+    # The old lists are kept under a backup name, a later migration drops them
+    # once the new collections have been checked in production
+    await users_collection.update_many(
+        {"requested_books": {"$exists": True}},
+        {"$rename": {"requested_books": REQUESTED_BOOKS_BACKUP_FIELD}}
+    )
+    clear_cached_users()
+    return len(requests)
+
+
+MIGRATIONS: List[Tuple[str, Callable[[], Awaitable[int]]]] = [
+    ("book_requests", migrate_user_requests),
+    ("acquisition_queue", rebuild_acquisition_queue),
+    ("borrow_events_utc", convert_borrow_events_to_utc),
+]
+
+
+async def run_migrations() -> List[str]:
+    applied = []
+    for name, migration in MIGRATIONS:
+        if await migrations_collection.find_one({"_id": name}):
+            continue
+
+        migrated = await migration()
+        await migrations_collection.update_one(
+            {"_id": name},
+            {"$set": {"applied_at": datetime.now(), "migrated": migrated}},
+            upsert=True
+        )
+        logger.info(f"Applied migration '{name}' ({migrated} documents).")
+        applied.append(name)
+
+    return applied
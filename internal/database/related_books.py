@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from internal.database.database import related_books_collection
+
+RELATED_WRITE_BATCH = 500
+
+
+async def get_related_book_ids(book_id: str) -> Optional[List[str]]:
+    doc = await related_books_collection.find_one({"_id": book_id}, {"related": 1})
+    return doc["related"] if doc else None
+
+
+async def save_related_rows(rows: Dict[str, List[str]]):
+    now = datetime.now()
+    operations = [
+        UpdateOne({"_id": book_id}, {"$set": {"related": related, "updated_at": now}}, upsert=True)
+        for book_id, related in rows.items()
+    ]
+    for start in range(0, len(operations), RELATED_WRITE_BATCH):
+        await related_books_collection.bulk_write(operations[start:start + RELATED_WRITE_BATCH], ordered=False)
+
+
+async def delete_related_rows(book_id: str):
+    await related_books_collection.delete_one({"_id": book_id})
+    await related_books_collection.update_many({"related": book_id}, {"$pull": {"related": book_id}})
+
+
+async def count_related_rows() -> int:
+    return await related_books_collection.estimated_document_count()
@@ -0,0 +1,302 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from internal.database.database import book_requests_collection, book_requesters_collection
+from internal.database.acquisitions import acquisition_key, add_demand, remove_demand, count_acquisition_items
+from internal.models.request import BookRequest, RequestStatus
+
+# Requests an admin still has to act on, these make up the acquisition queue
+CLOSED_STATUSES = {RequestStatus.ADDED, RequestStatus.DENIED}
+OPEN_REQUESTS_QUERY = {"status": {"$nin": [status.value for status in CLOSED_STATUSES]}}
+# Requests that still count towards a user's request limit
+ACTIVE_STATUSES = {RequestStatus.REQUEST_SENT, RequestStatus.ON_HOLD}
+REQUESTS_SORT = [("requested_at", ASCENDING), ("_id", ASCENDING)]
+
+REQUEST_WRITE_BATCH = 500
+
+
+def _requester_id(request_id: str, user_id: str) -> str:
+    # One requester row per user and request, duplicates fail on the primary key
+    return f"{request_id}:{user_id}"
+
+
+def _is_open(doc: Dict[str, Any]) -> bool:
+    return doc.get("status") not in {status.value for status in CLOSED_STATUSES}
+
+
+def _request_from_document(doc: Dict[str, Any], requested_at: Optional[datetime] = None) -> BookRequest:
+    return BookRequest(
+        id=doc["_id"],
+        title=doc.get("title") or "",
+        authors=doc.get("authors") or [],
+        isbn=doc.get("isbn"),
+        publisher=doc.get("publisher"),
+        cover_image=doc.get("cover_image"),
+        status=doc.get("status", RequestStatus.REQUEST_SENT),
+        requested_at=requested_at or doc["requested_at"],
+        status_updated_at=doc["status_updated_at"]
+    )
+
+
+def _archived_request_id(request_id: str, closed_at: datetime) -> str:
+    return f"{request_id}@{closed_at:%Y%m%d%H%M%S%f}"
+
+
+async def archive_closed_request(request_id: str, since: datetime):
+    doc = await book_requests_collection.find_one({"_id": request_id})
+    if not doc or _is_open(doc):
+        return
+
+    # The closed round keeps its status and requesters under its own id, the
+    # volume id is then free to start a new round. Every step is keyed on the
+    # closing time, so concurrent callers repeat the same writes.
+    closed_at = doc["status_updated_at"]
+    archived_id = _archived_request_id(request_id, closed_at)
+    await book_requests_collection.update_one(
+        {"_id": archived_id},
+        {"$setOnInsert": {key: value for key, value in doc.items() if key != "_id"}},
+        upsert=True
+    )
+
+    cursor = book_requesters_collection.find({"request_id": request_id, "requested_at": {"$lte": closed_at}})
+    requesters = await cursor.to_list(length=None)
+    operations = [
+        UpdateOne(
+            {"_id": _requester_id(archived_id, requester["user_id"])},
+            {"$setOnInsert": {**requester, "_id": _requester_id(archived_id, requester["user_id"]), "request_id": archived_id}},
+            upsert=True
+        )
+        for requester in requesters
+    ]
+    for start in range(0, len(operations), REQUEST_WRITE_BATCH):
+        await book_requesters_collection.bulk_write(operations[start:start + REQUEST_WRITE_BATCH], ordered=False)
+    await book_requesters_collection.delete_many({"_id": {"$in": [requester["_id"] for requester in requesters]}})
+
+    await book_requests_collection.update_one(
+        {"_id": request_id, "status": doc["status"], "status_updated_at": closed_at},
+        {"$set": {
+            "status": RequestStatus.REQUEST_SENT.value,
+            "status_updated_at": since,
+            "requested_at": since,
+            "requester_count": 0
+        }}
+    )
+
+
+async def create_user_request(user_id: str, request: BookRequest) -> bool:
+    # A title that was already added or denied starts a new request, the
+    # closed one stays as it was for its requesters and the admin history
+    await archive_closed_request(request.id, request.requested_at)
+
+    try:
+        await book_requesters_collection.insert_one({
+            "_id": _requester_id(request.id, user_id),
+            "request_id": request.id,
+            "user_id": user_id,
+            "requested_at": request.requested_at
+        })
+    except DuplicateKeyError:
+        return False
+
+    # The first requester's copy of the volume details is kept for everyone
+    details = request.model_dump(exclude={"id", "status", "status_updated_at"})
+    details["acquisition_key"] = acquisition_key(request.isbn, request.title)
+    doc = await book_requests_collection.find_one_and_update(
+        {"_id": request.id},
+        {
+            "$setOnInsert": {
+                **details,
+                "status": RequestStatus.REQUEST_SENT.value,
+                "status_updated_at": request.requested_at
+            },
+            "$inc": {"requester_count": 1}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if _is_open(doc):
+        await add_demand(doc, 1)
+    return True
+
+
+async def get_user_requests(user_id: str) -> List[BookRequest]:
+    cursor = book_requesters_collection.find({"user_id": user_id}).sort("requested_at", ASCENDING)
+    requested_at = {doc["request_id"]: doc["requested_at"] async for doc in cursor}
+    if not requested_at:
+        return []
+
+    docs = {doc["_id"]: doc async for doc in book_requests_collection.find({"_id": {"$in": list(requested_at)}})}
+    return [
+        _request_from_document(docs[request_id], requested)
+        for request_id, requested in requested_at.items() if request_id in docs
+    ]
+
+
+async def get_user_request(user_id: str, request_id: str) -> Optional[BookRequest]:
+    requester = await book_requesters_collection.find_one({"_id": _requester_id(request_id, user_id)})
+    if not requester:
+        return None
+
+    doc = await book_requests_collection.find_one({"_id": request_id})
+    return _request_from_document(doc, requester["requested_at"]) if doc else None
+
+
+async def delete_user_request(user_id: str, request_id: str) -> bool:
+    result = await book_requesters_collection.delete_one({"_id": _requester_id(request_id, user_id)})
+    if result.deleted_count == 0:
+        return False
+
+    doc = await book_requests_collection.find_one_and_update(
+        {"_id": request_id},
+        {"$inc": {"requester_count": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not doc:
+        return True
+
+    # A request nobody is waiting on anymore disappears from the admin queue
+    abandoned = doc["requester_count"] <= 0
+    if abandoned:
+        await book_requests_collection.delete_one({"_id": request_id, "requester_count": {"$lte": 0}})
+    if _is_open(doc):
+        await remove_demand(doc, 1, drop_request=abandoned)
+    return True
+
+
+async def get_request_by_id(request_id: str) -> Optional[BookRequest]:
+    doc = await book_requests_collection.find_one({"_id": request_id})
+    return _request_from_document(doc) if doc else None
+
+
+async def get_requests(query: Dict[str, Any], skip: int = 0, limit: int = 0) -> List[BookRequest]:
+    cursor = book_requests_collection.find(query).sort(REQUESTS_SORT).skip(skip).limit(limit)
+    return [_request_from_document(doc) async for doc in cursor]
+
+
+async def count_requests(query: Dict[str, Any]) -> int:
+    return await book_requests_collection.count_documents(query)
+
+
+async def get_request_candidates(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    cursor = book_requests_collection.find(query, {"title": 1, "isbn": 1}).sort(REQUESTS_SORT)
+    return await cursor.to_list(length=None)
+
+
+async def get_requests_by_ids(request_ids: List[str]) -> List[BookRequest]:
+    docs = {doc["_id"]: doc async for doc in book_requests_collection.find({"_id": {"$in": request_ids}})}
+    return [_request_from_document(docs[request_id]) for request_id in request_ids if request_id in docs]
+
+
+async def get_first_requester_ids(request_ids: List[str]) -> Dict[str, str]:
+    pipeline = [
+        {"$match": {"request_id": {"$in": request_ids}}},
+        {"$sort": {"requested_at": ASCENDING}},
+        {"$group": {"_id": "$request_id", "user_id": {"$first": "$user_id"}}},
+    ]
+    return {doc["_id"]: doc["user_id"] async for doc in book_requesters_collection.aggregate(pipeline)}
+
+
+async def get_requester_ids(request_id: str) -> List[str]:
+    cursor = book_requesters_collection.find({"request_id": request_id}, {"user_id": 1}).sort("requested_at", ASCENDING)
+    return [doc["user_id"] async for doc in cursor]
+
+
+async def count_active_user_requests(user_id: str) -> int:
+    request_ids = [
+        doc["request_id"]
+        async for doc in book_requesters_collection.find({"user_id": user_id}, {"request_id": 1})
+    ]
+    if not request_ids:
+        return 0
+
+    return await book_requests_collection.count_documents({
+        "_id": {"$in": request_ids},
+        "status": {"$in": [status.value for status in ACTIVE_STATUSES]}
+    })
+
+
+async def update_request_status(request_id: str, status: RequestStatus) -> bool:
+    previous = await book_requests_collection.find_one_and_update(
+        {"_id": request_id},
+        {"$set": {"status": status.value, "status_updated_at": datetime.now()}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
+        return False
+
+    # Only transitions between open and closed change the demand for a title
+    was_open, is_open = _is_open(previous), status not in CLOSED_STATUSES
+    if was_open and not is_open:
+        await remove_demand(previous, previous["requester_count"], drop_request=True)
+    elif is_open and not was_open:
+        await add_demand(previous, previous["requester_count"])
+    return True
+
+
+async def delete_request(request_id: str) -> bool:
+    doc = await book_requests_collection.find_one_and_delete({"_id": request_id})
+    await book_requesters_collection.delete_many({"request_id": request_id})
+    if doc and _is_open(doc):
+        await remove_demand(doc, doc["requester_count"], drop_request=True)
+    return doc is not None
+
+
+async def save_migrated_requests(requests: Dict[str, Dict[str, Any]], requesters: List[Dict[str, Any]]):
+    request_operations = [
+        UpdateOne({"_id": request_id}, {"$set": doc}, upsert=True)
+        for request_id, doc in requests.items()
+    ]
+    requester_operations = [
+        UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True)
+        for doc in requesters
+    ]
+
+    for collection, operations in (
+        (book_requests_collection, request_operations),
+        (book_requesters_collection, requester_operations)
+    ):
+        for start in range(0, len(operations), REQUEST_WRITE_BATCH):
+            await collection.bulk_write(operations[start:start + REQUEST_WRITE_BATCH], ordered=False)
+
+
+async def count_saved_requests(request_ids: List[str], requester_ids: List[str]) -> Tuple[int, int]:
+    saved_requests = saved_requesters = 0
+    for start in range(0, len(request_ids), REQUEST_WRITE_BATCH):
+        saved_requests += await book_requests_collection.count_documents(
+            {"_id": {"$in": request_ids[start:start + REQUEST_WRITE_BATCH]}}
+        )
+    for start in range(0, len(requester_ids), REQUEST_WRITE_BATCH):
+        saved_requesters += await book_requesters_collection.count_documents(
+            {"_id": {"$in": requester_ids[start:start + REQUEST_WRITE_BATCH]}}
+        )
+    return saved_requests, saved_requesters
+
+
+async def rebuild_acquisition_queue() -> int:
+    # Requests stored before the queue existed get their grouping key first
+    operations = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"acquisition_key": acquisition_key(doc.get("isbn"), doc.get("title"))}})
+        async for doc in book_requests_collection.find({"acquisition_key": {"$exists": False}}, {"isbn": 1, "title": 1})
+    ]
+    for start in range(0, len(operations), REQUEST_WRITE_BATCH):
+        await book_requests_collection.bulk_write(operations[start:start + REQUEST_WRITE_BATCH], ordered=False)
+
+    pipeline = [
+        {"$match": OPEN_REQUESTS_QUERY},
+        {"$sort": {"requested_at": ASCENDING}},
+        {"$group": {
+            "_id": "$acquisition_key",
+            "title": {"$first": "$title"},
+            "authors": {"$first": "$authors"},
+            "isbn": {"$first": "$isbn"},
+            "cover_image": {"$first": "$cover_image"},
+            "request_ids": {"$push": "$_id"},
+            "requester_count": {"$sum": "$requester_count"},
+            "first_requested_at": {"$min": "$requested_at"},
+        }},
+        # Replacing the collection keeps its indexes and swaps the contents atomically
+        {"$out": "acquisition_queue"},
+    ]
+    await book_requests_collection.aggregate(pipeline).to_list(length=None)
+    return await count_acquisition_items()
@@ -1,11 +1,13 @@
 from internal.database.database import users_collection
-from internal.models.user import User
+from internal.database.indexes import CASE_INSENSITIVE_COLLATION
+from internal.models.user import User, UserPreview
+from internal.search.user_index import index_user, unindex_user
+from internal.models.principal import Principal
+from internal.utils.cache import TTLCache
+from config.config import get_config
 from pymongo.errors import DuplicateKeyError
 from typing import Optional, List, Dict, Any
 from bson import ObjectId
-from pymongo import ASCENDING
-from internal.models.request import RequestStatus
-from datetime import datetime
 
 
 async def create_user(user: User) -> Optional[User]:
@@ -13,6 +15,7 @@ async def create_user(user: User) -> Optional[User]:
     try:
         result = await users_collection.insert_one(user_data)
         if result.inserted_id:
+            index_user(user.id, user.username, user.email)
             return user
     except DuplicateKeyError:
         return None
@@ -24,6 +27,99 @@ async def get_user_by_id(user_id: str) -> Optional[User]:
     return User(**user_data) if user_data else None
 
 
+# Only the id and role behind a token are cached, handlers that read or change
+# the user itself load the live document
+_principal_cache = TTLCache(maxsize=get_config("auth_cache_size"), ttl=get_config("auth_cache_ttl"))
+
+
+async def get_user_principal(user_id: str) -> Optional[Principal]:
+    principal = _principal_cache.get(user_id)
+    if principal is None:
+        user_data = await users_collection.find_one({"_id": user_id}, {"role": 1})
+        if not user_data:
+            return None
+        principal = Principal(id=user_data["_id"], role=user_data["role"])
+        _principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_cached_user(user_id: str):
+    _principal_cache.pop(user_id)
+
+
+def invalidate_cached_users(user_ids: List[str]):
+    for user_id in user_ids:
+        invalidate_cached_user(user_id)
+
+
+def clear_cached_users():
+    _principal_cache.clear()
+
+
+def principal_cache_metrics() -> Dict[str, int]:
+    return _principal_cache.stats()
+
+
+# Fields held by the user search index
+INDEXED_FIELDS = {"username", "email"}
+
+USER_PREVIEW_PROJECTION = {
+    "_id": 0,
+    "id": "$_id",
+    "username": 1,
+    "email": 1,
+    "borrow_count": {"$size": {"$ifNull": ["$borrowed_books", []]}},
+    "penalty_fee": {"$sum": "$penalties.amount"},
+    "has_penalty": {"$gt": [{"$size": {"$ifNull": ["$penalties", []]}}, 0]},
+    "banned": {"$ifNull": ["$banned", False]},
+}
+USERS_SORT = {"_id": 1}
+
+
+async def get_user_ids_by_username_ci(username: str, query: Optional[Dict[str, Any]] = None) -> List[str]:
+    return await users_collection.distinct(
+        "_id", {"username": username, **(query or {})}, collation=CASE_INSENSITIVE_COLLATION
+    )
+
+
+async def get_user_ids_by_email_ci(email: str, query: Optional[Dict[str, Any]] = None) -> List[str]:
+    return await users_collection.distinct(
+        "_id", {"email": email, **(query or {})}, collation=CASE_INSENSITIVE_COLLATION
+    )
+
+
+def build_users_query(only_with_penalties: bool = False, only_banned: bool = False) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if only_with_penalties:
+        # Same expression as the with_penalties partial index, so the planner can use it
+        query["penalties.0"] = {"$exists": True}
+    if only_banned:
+        query["banned"] = True
+    return query
+
+
+async def count_users(query: Dict[str, Any]) -> int:
+    return await users_collection.count_documents(query)
+
+
+async def get_user_previews(query: Dict[str, Any], skip: int = 0, limit: int = 0) -> List[UserPreview]:
+    pipeline: List[Dict[str, Any]] = [{"$match": query}, {"$sort": USERS_SORT}, {"$skip": skip}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": USER_PREVIEW_PROJECTION})
+    return [UserPreview(**doc) async for doc in users_collection.aggregate(pipeline)]
+
+
+async def get_user_search_fields(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    cursor = users_collection.find(query, {"username": 1, "email": 1}).sort(list(USERS_SORT.items()))
+    return await cursor.to_list(length=None)
+
+
+async def get_users_by_ids(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    cursor = users_collection.find({"_id": {"$in": user_ids}}, {"username": 1, "email": 1})
+    return {doc["_id"]: doc async for doc in cursor}
+
+
 async def get_user_by_email(email: str) -> Optional[User]:
     user_data = await users_collection.find_one({"email": email})
     return User(**user_data) if user_data else None
@@ -33,16 +129,31 @@ async def get_penalty_users_count() -> int:
     return await users_collection.count_documents({"penalties.0": {"$exists": True}})
 
 
-async def update_user(user: User) -> bool:
-    user_data = user.model_dump(by_alias=True)
-    result = await users_collection.update_one(
-        {"_id": user.id}, {"$set": user_data}
-    )
-    return result.modified_count > 0
+async def save_user(
+    user: User,
+    push: Optional[Dict[str, Any]] = None,
+    pull: Optional[Dict[str, Any]] = None,
+    add_to_set: Optional[Dict[str, Any]] = None,
+) -> bool:
+    update = user.build_update(push=push, pull=pull, add_to_set=add_to_set)
+    if not update:
+        return True
+
+    result = await users_collection.update_one({"_id": user.id}, update)
+    invalidate_cached_user(user.id)
+    if result.matched_count == 0:
+        return False
+
+    if user.dirty_fields & INDEXED_FIELDS:
+        index_user(user.id, user.username, user.email)
+    user.mark_clean()
+    return True
 
 
 async def delete_user(user_id: str) -> bool:
     result = await users_collection.delete_one({"_id": ObjectId(user_id)})
+    invalidate_cached_user(user_id)
+    unindex_user(user_id)
     return result.deleted_count > 0
 
 
@@ -56,6 +167,7 @@ async def ban_user(user_id: str) -> bool:
         {"_id": user_id},
         {"$set": {"banned": True}}
     )
+    invalidate_cached_user(user_id)
     return result.modified_count > 0
 
 
@@ -64,45 +176,7 @@ async def unban_user(user_id: str) -> bool:
         {"_id": user_id},
         {"$set": {"banned": False}}
     )
-    return result.modified_count > 0
-
-
-async def iter_all_requests(skip: int, limit: int) -> List[Dict[str, Any]]:
-    pipeline = [
-        {"$unwind": "$requested_books"},
-        {"$project": {
-            "_id": 0,
-            "user_id": "$_id",
-            "username": 1,
-            "email": 1,
-            "request": "$requested_books",
-        }},
-        {"$sort": {"request.requested_at": ASCENDING}},
-        {"$skip": skip},
-        {"$limit": limit},
-    ]
-    return await users_collection.aggregate(pipeline).to_list(length=limit)
-
-
-async def update_request_status_for_all(request_id: str, new_status: RequestStatus) -> bool:
-    result = await users_collection.update_many(
-        {"requested_books.id": request_id},
-        {
-            "$set": {
-                "requested_books.$[elem].status": new_status,
-                "requested_books.$[elem].status_updated_at": datetime.now(),
-            }
-        },
-        array_filters=[{"elem.id": request_id}]
-    )
-    return result.modified_count > 0
-
-
-async def delete_request_from_all_users(request_id: str) -> bool:
-    result = await users_collection.update_many(
-        {"requested_books": {"$type": "array"}},
-        {"$pull": {"requested_books": {"id": request_id}}}
-    )
+    invalidate_cached_user(user_id)
     return result.modified_count > 0
 
 
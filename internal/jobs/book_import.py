@@ -0,0 +1,124 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from config.config import get_config
+from internal.database.books import create_books, get_existing_isbns
+from internal.database.jobs import create_job, get_job_by_id, get_jobs_by_status, record_job_progress, set_job_status
+from internal.models.book import Book
+from internal.models.job import Job, JobStatus
+from internal.utils.google_books import search_google_books, fetch_google_book
+from internal.utils.logger import logger
+
+BOOK_IMPORT_JOB = "book_import"
+
+# Job id to task, so the same import never runs twice in this process
+_running_imports: Dict[str, asyncio.Task] = {}
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second: float):
+        self.interval = 1 / requests_per_second
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _fetch_book_by_isbn(isbn: str, limiter: RateLimiter, semaphore: asyncio.Semaphore) -> Optional[Book]:
+    async with semaphore:
+        await limiter.wait()
+        matches = await search_google_books(isbn)
+        if not matches:
+            return None
+
+        await limiter.wait()
+        book = await fetch_google_book(matches[0]["id"])
+        return book if book and book.isbn else None
+
+
+async def import_books(job: Job):
+    isbns: List[str] = job.payload.get("isbns", [])
+    cursor: int = job.payload.get("cursor", 0)
+    pending = isbns[cursor:]
+
+    existing = await get_existing_isbns(pending)
+    limiter = RateLimiter(get_config("book_import_requests_per_second"))
+    semaphore = asyncio.Semaphore(get_config("book_import_concurrency"))
+    batch_size = get_config("book_import_batch_size")
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        to_fetch = [isbn for isbn in batch if isbn not in existing]
+
+        books = await asyncio.gather(*(_fetch_book_by_isbn(isbn, limiter, semaphore) for isbn in to_fetch))
+        found = [book for book in books if book]
+        failed_isbns = [isbn for isbn, book in zip(to_fetch, books) if not book]
+
+        created = await create_books(found)
+
+        # Books that resolved to an ISBN already in the catalog count as skipped
+        skipped = len(batch) - len(to_fetch) + len(found) - len(created)
+        await record_job_progress(
+            job.id,
+            processed=len(batch),
+            succeeded=len(created),
+            skipped=skipped,
+            failed_items=failed_isbns,
+            fields={"payload.cursor": cursor + start + len(batch)}
+        )
+
+
+async def _run_book_import(job_id: str):
+    job = await get_job_by_id(job_id)
+    if not job or job.status == JobStatus.COMPLETED:
+        return
+
+    await set_job_status(job_id, JobStatus.RUNNING)
+    try:
+        await import_books(job)
+    except Exception as e:
+        logger.error(f"Book import {job_id} failed: {e}")
+        await set_job_status(job_id, JobStatus.FAILED, error=str(e))
+        return
+
+    await set_job_status(job_id, JobStatus.COMPLETED)
+    logger.info(f"Book import {job_id} completed ({job.total} ISBNs)")
+
+
+def schedule_book_import(job_id: str) -> bool:
+    if job_id in _running_imports:
+        return False
+
+    task = asyncio.create_task(_run_book_import(job_id))
+    _running_imports[job_id] = task
+    task.add_done_callback(lambda _: _running_imports.pop(job_id, None))
+    return True
+
+
+async def start_book_import(isbns: List[str]) -> Job:
+    # Duplicates in the submitted list are dropped, keeping the original order
+    unique_isbns = list(dict.fromkeys(isbn.strip() for isbn in isbns if isbn.strip()))
+
+    job = await create_job(Job(
+        type=BOOK_IMPORT_JOB,
+        total=len(unique_isbns),
+        payload={"isbns": unique_isbns, "cursor": 0}
+    ))
+    schedule_book_import(job.id)
+    return job
+
+
+async def resume_interrupted_book_imports() -> int:
+    # Jobs left pending or running belonged to a process that has since exited
+    jobs = await get_jobs_by_status(BOOK_IMPORT_JOB, JobStatus.PENDING)
+    jobs += await get_jobs_by_status(BOOK_IMPORT_JOB, JobStatus.RUNNING)
+
+    for job in jobs:
+        schedule_book_import(job.id)
+    return len(jobs)
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, Dict, List, Set
+from internal.database.database import books_collection, users_collection
+from internal.database.users import invalidate_cached_users
+from internal.models.book import Book
+from internal.utils.email import generate_html_email
+from internal.utils.mail_queue import mail_queue
+from internal.utils.logger import logger
+
+# Emails of one fan-out waiting in the mail queue at a time, so a long
+# subscriber list does not fill the queue other emails share
+NOTIFY_CONCURRENCY = 20
+
+# Strong references so running fan-outs are not garbage collected
+_running_tasks: Set[asyncio.Task] = set()
+
+
+async def notify_subscribers(book: Book) -> int:
+    subscriber_ids = list(book.notify_me_list or [])
+    if not subscriber_ids:
+        return 0
+
+    users_cursor = users_collection.find({"_id": {"$in": subscriber_ids}}, {"email": 1})
+    subscribers: List[Dict[str, Any]] = [doc async for doc in users_cursor]
+
+    # Every subscriber gets the same message, so it is rendered once
+    subject = f"Book '{book.title}' is now available"
+    html_body = await asyncio.to_thread(generate_html_email, book)
+
+    semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+
+    async def deliver(subscriber: Dict[str, Any]) -> bool:
+        async with semaphore:
+            return await mail_queue.deliver(subscriber["email"], subject, html_body)
+
+    sent = await asyncio.gather(*(deliver(subscriber) for subscriber in subscribers))
+
+    # Subscriptions are only dropped once delivery succeeded, a failed send
+    # keeps the subscriber for the next time the book becomes available
+    delivered_ids = [subscriber["_id"] for subscriber, ok in zip(subscribers, sent) if ok]
+    if delivered_ids:
+        await users_collection.update_many(
+            {"_id": {"$in": delivered_ids}},
+            {"$pull": {"notify_me_list": book.id}}
+        )
+        invalidate_cached_users(delivered_ids)
+
+    # Subscribers whose account no longer exists are dropped from the book as well
+    existing_ids = {subscriber["_id"] for subscriber in subscribers}
+    removed_ids = [user_id for user_id in subscriber_ids if user_id not in existing_ids]
+    if delivered_ids or removed_ids:
+        await books_collection.update_one(
+            {"_id": book.id},
+            {"$pull": {"notify_me_list": {"$in": delivered_ids + removed_ids}}}
+        )
+
+    return len(delivered_ids)
+
+
+async def _run_notify_subscribers(book: Book):
+    try:
+        count = await notify_subscribers(book)
+        logger.info(f"Sent availability notifications for '{book.title}' to {count} subscribers")
+    except Exception as e:
+        logger.error(f"Failed to notify subscribers of book {book.id}: {e}")
+
+
+def schedule_subscriber_notifications(book: Book):
+    if not book.notify_me_list:
+        return
+
+    task = asyncio.create_task(_run_notify_subscribers(book))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
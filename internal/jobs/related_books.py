@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Dict, List, Set
+from internal.database.database import books_collection, users_collection
+from internal.database.related_books import save_related_rows, delete_related_rows
+from internal.search.book_index import related_index
+from internal.search.related_index import count_co_borrows
+from internal.utils.logger import logger
+
+REFRESH_CHUNK_SIZE = 200
+
+# Strong references so running refreshes are not garbage collected
+_running_tasks: Set[asyncio.Task] = set()
+
+
+async def load_borrow_histories() -> int:
+    cursor = users_collection.find({"borrowed_history.1": {"$exists": True}}, {"borrowed_history": 1})
+    histories = [doc["borrowed_history"] async for doc in cursor]
+    related_index.set_co_borrowed(await asyncio.to_thread(count_co_borrows, histories))
+    return len(histories)
+
+
+async def load_popularity() -> int:
+    # Borrows update popularity as they happen, this catches anything missed since
+    count = 0
+    async for doc in books_collection.find({}, {"borrow_count": 1}):
+        related_index.set_popularity(doc["_id"], doc.get("borrow_count") or 0)
+        count += 1
+    return count
+
+
+def _compute_rows(book_ids: List[str]) -> Dict[str, List[str]]:
+    rows = {}
+    for book_id in book_ids:
+        related = related_index.neighbors(book_id)
+        if related is not None:
+            rows[book_id] = related
+    return rows
+
+
+async def refresh_related_books(book_ids: List[str]) -> int:
+    rows = _compute_rows(book_ids)
+
+    # Books now ranked closest to a changed book are likely to rank it as well
+    neighbor_ids = {related_id for related in rows.values() for related_id in related if related_id not in rows}
+    rows.update(_compute_rows(list(neighbor_ids)))
+
+    await save_related_rows(rows)
+    return len(rows)
+
+
+async def refresh_all_related_books() -> int:
+    started = time.monotonic()
+    await load_borrow_histories()
+    await load_popularity()
+
+    book_ids = related_index.book_ids()
+    for start in range(0, len(book_ids), REFRESH_CHUNK_SIZE):
+        # Writing chunk by chunk hands the event loop back to requests in between
+        await save_related_rows(_compute_rows(book_ids[start:start + REFRESH_CHUNK_SIZE]))
+
+    logger.info(f"Related books table rebuilt for {len(book_ids)} books in {round(time.monotonic() - started, 3)}s")
+    return len(book_ids)
+
+
+async def _run_refresh(book_ids: List[str]):
+    try:
+        await refresh_related_books(book_ids)
+    except Exception as e:
+        logger.error(f"Failed to refresh related books for {book_ids}: {e}")
+
+
+async def _run_removal(book_id: str):
+    try:
+        await delete_related_rows(book_id)
+    except Exception as e:
+        logger.error(f"Failed to remove book {book_id} from related books: {e}")
+
+
+async def _run_full_refresh():
+    try:
+        await refresh_all_related_books()
+    except Exception as e:
+        logger.error(f"Failed to rebuild the related books table: {e}")
+
+
+def _track(task: asyncio.Task):
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+
+
+def schedule_related_refresh(book_ids: List[str]):
+    if book_ids:
+        _track(asyncio.create_task(_run_refresh(book_ids)))
+
+
+def schedule_related_removal(book_id: str):
+    _track(asyncio.create_task(_run_removal(book_id)))
+
+
+def schedule_full_related_refresh():
+    _track(asyncio.create_task(_run_full_refresh()))
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Dict, List
+from internal.database.books import delete_books_by_ids, remove_book_references
+from internal.database.jobs import create_job, get_job_by_id, get_jobs_by_status, record_job_progress, set_job_status
+from internal.models.job import Job, JobStatus
+from internal.utils.logger import logger
+
+HARD_BAN_JOB = "hard_ban_cleanup"
+CLEANUP_BATCH_SIZE = 100
+
+# Job id to task, so the same cleanup never runs twice in this process
+_running_cleanups: Dict[str, asyncio.Task] = {}
+
+
+async def purge_banned_user_books(job: Job):
+    user_id: str = job.payload["user_id"]
+    book_ids: List[str] = job.payload.get("book_ids", [])
+    cursor: int = job.payload.get("cursor", 0)
+    pending = book_ids[cursor:]
+
+    for start in range(0, len(pending), CLEANUP_BATCH_SIZE):
+        batch = pending[start:start + CLEANUP_BATCH_SIZE]
+        deleted = await delete_books_by_ids(batch)
+        # The banned user keeps their own records until they are unbanned
+        await remove_book_references(batch, exclude_user_id=user_id)
+
+        await record_job_progress(
+            job.id,
+            processed=len(batch),
+            succeeded=deleted,
+            skipped=len(batch) - deleted,
+            fields={"payload.cursor": cursor + start + len(batch)}
+        )
+
+
+async def _run_hard_ban_cleanup(job_id: str):
+    job = await get_job_by_id(job_id)
+    if not job or job.status == JobStatus.COMPLETED:
+        return
+
+    await set_job_status(job_id, JobStatus.RUNNING)
+    try:
+        await purge_banned_user_books(job)
+    except Exception as e:
+        logger.error(f"Hard-ban cleanup {job_id} failed: {e}")
+        await set_job_status(job_id, JobStatus.FAILED, error=str(e))
+        return
+
+    await set_job_status(job_id, JobStatus.COMPLETED)
+    logger.info(f"Hard-ban cleanup {job_id} completed ({job.total} books)")
+
+
+def schedule_hard_ban_cleanup(job_id: str) -> bool:
+    if job_id in _running_cleanups:
+        return False
+
+    task = asyncio.create_task(_run_hard_ban_cleanup(job_id))
+    _running_cleanups[job_id] = task
+    task.add_done_callback(lambda _: _running_cleanups.pop(job_id, None))
+    return True
+
+
+async def start_hard_ban_cleanup(user_id: str, book_ids: List[str]) -> Job:
+    unique_ids = list(dict.fromkeys(book_ids))
+
+    job = await create_job(Job(
+        type=HARD_BAN_JOB,
+        total=len(unique_ids),
+        payload={"user_id": user_id, "book_ids": unique_ids, "cursor": 0}
+    ))
+    schedule_hard_ban_cleanup(job.id)
+    return job
+
+
+async def resume_interrupted_hard_ban_cleanups() -> int:
+    # Jobs left pending or running belonged to a process that has since exited
+    jobs = await get_jobs_by_status(HARD_BAN_JOB, JobStatus.PENDING)
+    jobs += await get_jobs_by_status(HARD_BAN_JOB, JobStatus.RUNNING)
+
+    for job in jobs:
+        schedule_hard_ban_cleanup(job.id)
+    return len(jobs)
@@ -1,6 +1,5 @@
 from pydantic import BaseModel, Field
 from bson import ObjectId
-import bcrypt
 
 
 class Admin(BaseModel):
@@ -10,9 +9,6 @@ class Admin(BaseModel):
     password: str
     role: str
 
-    def check_password(self, plain_password: str) -> bool:
-        return bcrypt.checkpw(plain_password.encode(), self.password.encode())
-
     def __setattr__(self, name, value):
         if name == "id" and hasattr(self, "id"):
             raise AttributeError("The 'id' field is immutable and cannot be changed after creation.")
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from bson import ObjectId
 from datetime import datetime
+from .tracked import TrackedModel
 
 
 class BookCategory(BaseModel):
@@ -14,7 +15,7 @@ class BookPenalty(BaseModel):
     amount: float
 
 
-class Book(BaseModel):
+class Book(TrackedModel):
     id: str = Field(default_factory=lambda: str(ObjectId()), alias="_id")
     title: str
     authors: List[str]
@@ -70,6 +71,7 @@ class BorrowedBookPreview(BaseModel):
     borrowed_at: datetime
     return_date: datetime
     currently_borrowed_by: Optional[str]
+    currently_borrowed_by_username: Optional[str] = None
 
 
 class BookCreate(BaseModel):
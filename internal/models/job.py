@@ -0,0 +1,47 @@
+from enum import Enum
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from bson import ObjectId
+from datetime import datetime
+
+
+class JobStatus(str, Enum):
+    PENDING = "Pending"
+    RUNNING = "Running"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    type: str
+    status: JobStatus = JobStatus.PENDING
+    payload: Dict[str, Any] = {}
+
+    total: int = 0
+    processed: int = 0
+    succeeded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    failed_items: List[str] = []
+
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+
+class JobProgress(BaseModel):
+    id: str
+    type: str
+    status: JobStatus
+    total: int
+    processed: int
+    succeeded: int
+    skipped: int
+    failed: int
+    failed_items: List[str]
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
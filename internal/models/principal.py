@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class Principal(BaseModel):
+    id: str
+    role: str
@@ -57,3 +57,14 @@ class BookRequestPreview(BaseModel):
     status: RequestStatus = RequestStatus.REQUEST_SENT
     requested_at: datetime
     status_updated_at: datetime
+
+
+class AcquisitionItem(BaseModel):
+    key: str
+    title: str
+    authors: List[str] = []
+    isbn: Optional[str] = None
+    cover_image: Optional[str] = None
+    request_ids: List[str] = []
+    requester_count: int
+    first_requested_at: datetime
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, Dict, Optional, Set
+
+
+class TrackedModel(BaseModel):
+    _dirty_fields: Set[str] = PrivateAttr(default_factory=set)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._dirty_fields.add(name)
+
+    @property
+    def dirty_fields(self) -> Set[str]:
+        return set(self._dirty_fields)
+
+    def mark_clean(self):
+        self._dirty_fields.clear()
+
+    def build_update(
+        self,
+        push: Optional[Dict[str, Any]] = None,
+        pull: Optional[Dict[str, Any]] = None,
+        add_to_set: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        # Reassigned fields are sent as $set, in-place list changes must be
+        # passed explicitly as array operators so they never overwrite the array
+        update: Dict[str, Any] = {}
+
+        if self._dirty_fields:
+            changed = self.model_dump(by_alias=True, include=self._dirty_fields)
+            if changed:
+                update["$set"] = changed
+        if push:
+            update["$push"] = push
+        if pull:
+            update["$pull"] = pull
+        if add_to_set:
+            update["$addToSet"] = add_to_set
+
+        return update
@@ -3,10 +3,10 @@ from bson import ObjectId
 from typing import Optional, List
 from .request import BookRequest
 from .book import BookPenalty
-import bcrypt
+from .tracked import TrackedModel
 
 
-class User(BaseModel):
+class User(TrackedModel):
     id: str = Field(default_factory=lambda: str(ObjectId()), alias="_id")
     username: str
     email: str
@@ -16,13 +16,9 @@ class User(BaseModel):
     borrowed_books: Optional[List[str]] = []
     borrowed_history: Optional[List[str]] = []
     overdue_books: Optional[List[str]] = []
-    requested_books: Optional[list[BookRequest]] = []
     notify_me_list: Optional[List[str]] = []
     penalties: Optional[List[BookPenalty]] = []
 
-    def check_password(self, plain_password: str) -> bool:
-        return bcrypt.checkpw(plain_password.encode(), self.password.encode())
-
     def __setattr__(self, name, value):
         if name == "id" and hasattr(self, "id"):
             raise AttributeError("The 'id' field is immutable and cannot be changed after creation.")
@@ -37,12 +33,15 @@ class PublicUser(BaseModel):
     borrowed_books: Optional[List[str]] = []
     borrowed_history: Optional[List[str]] = []
     overdue_books: Optional[List[str]] = []
-    requested_books: Optional[list[BookRequest]] = []
     notify_me_list: Optional[List[str]] = []
     penalties: Optional[List[BookPenalty]] = []
     banned: bool = False
 
 
+class UserDetails(PublicUser):
+    requested_books: List[BookRequest] = []
+
+
 class UserPreview(BaseModel):
     id: str
     username: str
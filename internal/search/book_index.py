@@ -0,0 +1,71 @@
+from typing import List, Optional, Tuple
+from internal.database.database import books_collection
+from internal.models.book import Book
+from .ngram_index import NGramIndex, serves_query
+from .prefix_index import PrefixIndex
+from .related_index import RelatedIndex, book_features
+from .facet_index import FacetIndex, book_facets
+
+CANDIDATE_LIMIT = 300
+INDEXED_FIELDS_PROJECTION = {"title": 1, "authors": 1, "categories": 1, "publisher": 1, "borrow_count": 1, "language": 1}
+
+book_index = NGramIndex()
+suggestion_index = PrefixIndex()
+related_index = RelatedIndex()
+facet_index = FacetIndex()
+
+
+def _searchable_texts(doc: dict) -> List[Optional[str]]:
+    texts = [doc.get("title"), doc.get("publisher")]
+    texts += doc.get("authors") or []
+    for cat in doc.get("categories") or []:
+        texts.append(cat.get("category"))
+        texts.append(cat.get("subcategory"))
+    return texts
+
+
+def _suggestion_phrases(doc: dict) -> List[Tuple[str, Optional[str]]]:
+    phrases = [("title", doc.get("title")), ("publisher", doc.get("publisher"))]
+    phrases += [("author", author) for author in doc.get("authors") or []]
+    return phrases
+
+
+def index_book(book: Book):
+    doc = book.model_dump(include=set(INDEXED_FIELDS_PROJECTION))
+    book_index.add(book.id, _searchable_texts(doc))
+    suggestion_index.add(book.id, _suggestion_phrases(doc))
+    related_index.set_book(book.id, book_features(doc), book.borrow_count)
+    facet_index.add(book.id, book_facets(doc))
+
+
+def unindex_book(book_id: str):
+    book_index.remove(book_id)
+    suggestion_index.remove(book_id)
+    related_index.remove_book(book_id)
+    facet_index.remove(book_id)
+
+
+def search_book_candidates(query: str, limit: Optional[int] = CANDIDATE_LIMIT) -> Optional[List[str]]:
+    # None means the index can't shortlist this query and the caller has to scan
+    if not serves_query(query):
+        return None
+    return book_index.candidates(query, limit)
+
+
+def suggest_completions(query: str, limit: int) -> List[Tuple[str, str, int]]:
+    return suggestion_index.suggest(query, limit)
+
+
+async def build_book_index() -> int:
+    book_index.clear()
+    related_index.clear()
+    facet_index.clear()
+    phrases = []
+    async for doc in books_collection.find({}, INDEXED_FIELDS_PROJECTION):
+        book_index.add(doc["_id"], _searchable_texts(doc))
+        phrases.append((doc["_id"], _suggestion_phrases(doc)))
+        related_index.set_book(doc["_id"], book_features(doc), doc.get("borrow_count") or 0)
+        facet_index.add(doc["_id"], book_facets(doc))
+
+    suggestion_index.rebuild(phrases)
+    return len(book_index)
@@ -0,0 +1,75 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+CategoryKey = Tuple[str, Optional[str]]
+
+
+def book_facets(doc: dict) -> Tuple[Set[CategoryKey], Optional[str]]:
+    categories: Set[CategoryKey] = set()
+    for cat in doc.get("categories") or []:
+        category = (cat.get("category") or "").strip()
+        if not category:
+            continue
+        subcategory = (cat.get("subcategory") or "").strip() or None
+        categories.add((category, subcategory))
+    return categories, doc.get("language") or None
+
+
+class FacetIndex:
+    def __init__(self):
+        self._documents: Dict[str, Tuple[Set[CategoryKey], Optional[str]]] = {}
+        self._categories: Counter = Counter()
+        self._subcategories: Dict[str, Counter] = defaultdict(Counter)
+        self._languages: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _apply(self, facets: Tuple[Set[CategoryKey], Optional[str]], delta: int):
+        categories, language = facets
+
+        # A book counts once per category even when listed with several subcategories
+        for category in {category for category, _ in categories}:
+            self._categories[category] += delta
+            if self._categories[category] <= 0:
+                del self._categories[category]
+
+        for category, subcategory in categories:
+            if not subcategory:
+                continue
+            counts = self._subcategories[category]
+            counts[subcategory] += delta
+            if counts[subcategory] <= 0:
+                del counts[subcategory]
+            if not counts:
+                del self._subcategories[category]
+
+        if language:
+            self._languages[language] += delta
+            if self._languages[language] <= 0:
+                del self._languages[language]
+
+    def add(self, doc_id: str, facets: Tuple[Set[CategoryKey], Optional[str]]):
+        self.remove(doc_id)
+        self._documents[doc_id] = facets
+        self._apply(facets, 1)
+
+    def remove(self, doc_id: str):
+        facets = self._documents.pop(doc_id, None)
+        if facets:
+            self._apply(facets, -1)
+
+    def clear(self):
+        self._documents.clear()
+        self._categories.clear()
+        self._subcategories.clear()
+        self._languages.clear()
+
+    def categories(self) -> List[Tuple[str, int, List[Tuple[str, int]]]]:
+        return [
+            (category, count, sorted(self._subcategories.get(category, {}).items()))
+            for category, count in sorted(self._categories.items())
+        ]
+
+    def languages(self) -> List[Tuple[str, int]]:
+        return sorted(self._languages.items())
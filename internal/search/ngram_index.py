@@ -0,0 +1,110 @@
+import re
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+WORD_PATTERN = re.compile(r"\w+")
+GRAM_SIZE = 3
+SHORT_PREFIX_SIZES = (1, 2)
+
+
+def normalize(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def tokenize(text: str) -> Set[str]:
+    normalized = normalize(text)
+    if not normalized:
+        return set()
+
+    tokens = set()
+    for word in normalized.split():
+        tokens.add(f"w:{word}")
+        for size in SHORT_PREFIX_SIZES:
+            tokens.add(f"p:{word[:size]}")
+
+    padded = f" {normalized} "
+    for i in range(len(padded) - GRAM_SIZE + 1):
+        tokens.add(f"g:{padded[i:i + GRAM_SIZE]}")
+
+    return tokens
+
+
+def query_tokens(query: str) -> Set[str]:
+    normalized = normalize(query)
+    if not normalized:
+        return set()
+
+    # Queries shorter than a trigram can only be matched on word prefixes
+    if len(normalized) < GRAM_SIZE:
+        return {f"p:{normalized}"} if " " not in normalized else set()
+
+    tokens = set()
+    for i in range(len(normalized) - GRAM_SIZE + 1):
+        tokens.add(f"g:{normalized[i:i + GRAM_SIZE]}")
+    return tokens
+
+
+def serves_query(query: str) -> bool:
+    # Short queries and ones that lose characters to normalization need a
+    # substring scan, the grams would shortlist the wrong documents
+    normalized = normalize(query)
+    return len(normalized) >= GRAM_SIZE and normalized == " ".join(query.lower().split())
+
+
+class NGramIndex:
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._documents: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._documents
+
+    def add(self, doc_id: str, texts: Iterable[Optional[str]]):
+        self.remove(doc_id)
+
+        tokens = set()
+        for text in texts:
+            if text:
+                tokens |= tokenize(text)
+
+        self._documents[doc_id] = tokens
+        for token in tokens:
+            self._postings[token].add(doc_id)
+
+    def remove(self, doc_id: str):
+        tokens = self._documents.pop(doc_id, None)
+        if not tokens:
+            return
+
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(doc_id)
+            if not ids:
+                del self._postings[token]
+
+    def clear(self):
+        self._postings.clear()
+        self._documents.clear()
+
+    def candidates(self, query: str, limit: Optional[int]) -> List[str]:
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+
+        scores: Dict[str, int] = defaultdict(int)
+        for token in tokens:
+            for doc_id in self._postings.get(token, ()):
+                scores[doc_id] += 1
+
+        # Documents containing every query gram are likely substring matches and
+        # rank first; the total stays capped so broad queries do not return the
+        # whole index to the caller, unless the caller asks for every match.
+        ranked = ((score, doc_id) for doc_id, score in scores.items())
+        best = heapq.nlargest(limit, ranked) if limit is not None else sorted(ranked, reverse=True)
+        return [doc_id for _, doc_id in best]
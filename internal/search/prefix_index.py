@@ -0,0 +1,121 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .ngram_index import normalize
+
+MAX_SUGGESTIONS = 20
+MAX_KEY_LENGTH = 64
+# Short prefixes match a large share of the catalog, so their rankings are memoized
+CACHED_PREFIX_LENGTH = 3
+
+# (kind, normalized text), e.g. ("author", "j r r tolkien")
+Phrase = Tuple[str, str]
+
+
+def _phrase_keys(normalized: str) -> List[str]:
+    # Every word start is a key, so "tolk" completes "J. R. R. Tolkien"
+    words = normalized.split()
+    return [" ".join(words[i:])[:MAX_KEY_LENGTH] for i in range(len(words))]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys: List[Tuple[str, Phrase]] = []
+        self._counts: Dict[Phrase, int] = {}
+        self._labels: Dict[Phrase, str] = {}
+        self._documents: Dict[str, Set[Phrase]] = {}
+        self._ranked: Dict[str, List[Phrase]] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @staticmethod
+    def _phrases(items: Iterable[Tuple[str, Optional[str]]]) -> Dict[Phrase, str]:
+        phrases = {}
+        for kind, text in items:
+            normalized = normalize(text) if text else ""
+            if normalized:
+                phrases.setdefault((kind, normalized), text.strip())
+        return phrases
+
+    def _invalidate(self, phrase: Phrase):
+        for key in _phrase_keys(phrase[1]):
+            for size in range(1, min(len(key), CACHED_PREFIX_LENGTH) + 1):
+                self._ranked.pop(key[:size], None)
+
+    def add(self, doc_id: str, items: Iterable[Tuple[str, Optional[str]]]):
+        self.remove(doc_id)
+
+        phrases = self._phrases(items)
+        self._documents[doc_id] = set(phrases)
+        for phrase, label in phrases.items():
+            if phrase not in self._counts:
+                self._counts[phrase] = 0
+                self._labels[phrase] = label
+                for key in _phrase_keys(phrase[1]):
+                    insort(self._keys, (key, phrase))
+            self._counts[phrase] += 1
+            self._invalidate(phrase)
+
+    def remove(self, doc_id: str):
+        phrases = self._documents.pop(doc_id, None)
+        if not phrases:
+            return
+
+        for phrase in phrases:
+            self._counts[phrase] -= 1
+            self._invalidate(phrase)
+            if self._counts[phrase] > 0:
+                continue
+
+            del self._counts[phrase]
+            del self._labels[phrase]
+            for key in _phrase_keys(phrase[1]):
+                position = bisect_left(self._keys, (key, phrase))
+                if position < len(self._keys) and self._keys[position] == (key, phrase):
+                    del self._keys[position]
+
+    def rebuild(self, documents: Iterable[Tuple[str, Iterable[Tuple[str, Optional[str]]]]]):
+        # Bulk loading sorts the key list once instead of inserting key by key
+        self._counts.clear()
+        self._labels.clear()
+        self._documents.clear()
+        self._ranked.clear()
+
+        for doc_id, items in documents:
+            phrases = self._phrases(items)
+            self._documents[doc_id] = set(phrases)
+            for phrase, label in phrases.items():
+                self._counts[phrase] = self._counts.get(phrase, 0) + 1
+                self._labels.setdefault(phrase, label)
+
+        self._keys = sorted(
+            (key, phrase) for phrase in self._counts for key in _phrase_keys(phrase[1])
+        )
+
+        # Single characters are the most expensive prefixes, rank them up front
+        for prefix in {key[0] for key, _ in self._keys}:
+            self._ranked[prefix] = self._rank(prefix)
+
+    def _rank(self, prefix: str) -> List[Phrase]:
+        matched: Set[Phrase] = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and self._keys[position][0].startswith(prefix):
+            matched.add(self._keys[position][1])
+            position += 1
+
+        # Phrases shared by more books rank first, ties are broken alphabetically
+        return heapq.nsmallest(MAX_SUGGESTIONS, matched, key=lambda p: (-self._counts[p], self._labels[p]))
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[str, str, int]]:
+        prefix = normalize(query)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+
+        ranked = self._ranked.get(prefix)
+        if ranked is None:
+            ranked = self._rank(prefix)
+            if len(prefix) <= CACHED_PREFIX_LENGTH:
+                self._ranked[prefix] = ranked
+
+        return [(self._labels[phrase], phrase[0], self._counts[phrase]) for phrase in ranked[:limit]]
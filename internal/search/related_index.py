@@ -0,0 +1,135 @@
+import heapq
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+RELATED_LIMIT = 20
+# Broad features such as "Fiction" only contribute their most popular members
+MAX_POSTING_SCAN = 200
+# Bounds the pairs generated by users with very long borrow histories
+MAX_HISTORY_SCAN = 200
+
+FEATURE_WEIGHTS = {"a": 5.0, "s": 3.0, "c": 2.0}
+CO_BORROW_WEIGHT = 1.0
+MAX_CO_BORROW_SCORE = 10.0
+
+
+def book_features(doc: dict) -> Set[str]:
+    features = set()
+    for author in doc.get("authors") or []:
+        if author and author.strip():
+            features.add(f"a:{author.strip().lower()}")
+
+    for cat in doc.get("categories") or []:
+        category = (cat.get("category") or "").strip().lower()
+        if not category:
+            continue
+        features.add(f"c:{category}")
+        subcategory = (cat.get("subcategory") or "").strip().lower()
+        if subcategory:
+            features.add(f"s:{category}/{subcategory}")
+
+    return features
+
+
+def count_co_borrows(histories: Iterable[List[str]]) -> Dict[str, Counter]:
+    # Quadratic in the history length, callers run this off the event loop
+    counts: Dict[str, Counter] = defaultdict(Counter)
+    for history in histories:
+        unique = list(dict.fromkeys(history))[-MAX_HISTORY_SCAN:]
+        for book_id in unique:
+            for other_id in unique:
+                if book_id != other_id:
+                    counts[book_id][other_id] += 1
+    return dict(counts)
+
+
+class RelatedIndex:
+    def __init__(self):
+        self._features: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._popularity: Dict[str, int] = {}
+        self._co_borrowed: Dict[str, Counter] = {}
+        self._top_members: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def __contains__(self, book_id: str) -> bool:
+        return book_id in self._features
+
+    def book_ids(self) -> List[str]:
+        return list(self._features)
+
+    def set_book(self, book_id: str, features: Set[str], popularity: int = 0):
+        self.remove_book(book_id)
+
+        self._features[book_id] = features
+        self._popularity[book_id] = popularity
+        for feature in features:
+            self._postings[feature].add(book_id)
+            self._top_members.pop(feature, None)
+
+    def remove_book(self, book_id: str):
+        features = self._features.pop(book_id, None)
+        self._popularity.pop(book_id, None)
+        if not features:
+            return
+
+        for feature in features:
+            self._top_members.pop(feature, None)
+            members = self._postings.get(feature)
+            if members is None:
+                continue
+            members.discard(book_id)
+            if not members:
+                del self._postings[feature]
+
+    def clear(self):
+        self._features.clear()
+        self._postings.clear()
+        self._popularity.clear()
+        self._top_members.clear()
+
+    def set_popularity(self, book_id: str, popularity: int):
+        features = self._features.get(book_id)
+        if features is None or self._popularity.get(book_id) == popularity:
+            return
+
+        self._popularity[book_id] = popularity
+        for feature in features:
+            self._top_members.pop(feature, None)
+
+    def set_co_borrowed(self, counts: Dict[str, Counter]):
+        self._co_borrowed = counts
+
+    def _members(self, feature: str) -> Iterable[str]:
+        members = self._postings.get(feature, ())
+        if len(members) <= MAX_POSTING_SCAN:
+            return members
+
+        top = self._top_members.get(feature)
+        if top is None:
+            top = heapq.nlargest(MAX_POSTING_SCAN, members, key=lambda b: self._popularity.get(b, 0))
+            self._top_members[feature] = top
+        return top
+
+    def neighbors(self, book_id: str, limit: int = RELATED_LIMIT) -> Optional[List[str]]:
+        features = self._features.get(book_id)
+        if features is None:
+            return None
+
+        scores: Dict[str, float] = defaultdict(float)
+        for feature in features:
+            weight = FEATURE_WEIGHTS[feature[0]]
+            for other_id in self._members(feature):
+                scores[other_id] += weight
+
+        for other_id, count in self._co_borrowed.get(book_id, {}).items():
+            scores[other_id] += min(count * CO_BORROW_WEIGHT, MAX_CO_BORROW_SCORE)
+
+        scores.pop(book_id, None)
+        ranked: List[Tuple[float, int, str]] = heapq.nlargest(limit, (
+            (score, self._popularity.get(other_id, 0), other_id)
+            for other_id, score in scores.items() if other_id in self._features
+        ))
+        return [other_id for _, _, other_id in ranked]
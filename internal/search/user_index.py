@@ -0,0 +1,26 @@
+from typing import List
+from internal.database.database import users_collection
+from .ngram_index import NGramIndex
+
+CANDIDATE_LIMIT = 300
+
+user_index = NGramIndex()
+
+
+def index_user(user_id: str, username: str, email: str):
+    user_index.add(user_id, [username, email])
+
+
+def unindex_user(user_id: str):
+    user_index.remove(user_id)
+
+
+def search_user_candidates(query: str, limit: int = CANDIDATE_LIMIT) -> List[str]:
+    return user_index.candidates(query, limit)
+
+
+async def build_user_index() -> int:
+    user_index.clear()
+    async for doc in users_collection.find({}, {"username": 1, "email": 1}):
+        index_user(doc["_id"], doc.get("username"), doc.get("email"))
+    return len(user_index)
@@ -1,10 +1,11 @@
-from typing import List
+from typing import Any, Dict, List
 from pydantic import BaseModel, Field
-from internal.models.user import PublicUser
+from internal.models.user import PublicUser, UserDetails
 from internal.models.admin import PublicAdmin
 from internal.models.book import Book, BookPreview, BorrowedBookPreview
-from internal.models.request import BookRequest, BookRequestPreview, RequestDetails, RequesterInfo
-from .types import LanguageItem
+from internal.models.job import JobProgress
+from internal.models.request import BookRequest, BookRequestPreview, RequestDetails, RequesterInfo, AcquisitionItem
+from .types import LanguageItem, Suggestion
 
 
 class SuccessResponse(BaseModel):
@@ -21,10 +22,18 @@ class VersionResponse(SuccessResponse):
     version: str = Field(None, examples=["v0.1.0"])
 
 
+class MetricsResponse(SuccessResponse):
+    metrics: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+
+
 class PublicUserResponse(SuccessResponse):
     user: PublicUser = Field(None)
 
 
+class UserDetailsResponse(SuccessResponse):
+    user: UserDetails
+
+
 class PublicAdminResponse(SuccessResponse):
     admin: PublicAdmin
 
@@ -54,12 +63,12 @@ class PaginatedBookPreviewListResponse(SuccessResponse):
     last_page: int
 
 
-class BulkExternalBookAddResponse(BaseModel):
-    code: str
-    message: str
-    success_count: int
-    failed_count: int
-    failed_isbns: List[str]
+class JobResponse(SuccessResponse):
+    job: JobProgress
+
+
+class SuggestionListResponse(SuccessResponse):
+    suggestions: List[Suggestion] = Field(default_factory=list)
 
 
 class CategoryListResponse(SuccessResponse):
@@ -69,6 +78,8 @@ class CategoryListResponse(SuccessResponse):
 class GroupedCategory(BaseModel):
     category: str
     subcategories: List[str]
+    count: int = 0
+    subcategory_counts: Dict[str, int] = Field(default_factory=dict)
 
 
 class GroupedCategoryListResponse(SuccessResponse):
@@ -79,6 +90,11 @@ class LanguageListResponse(SuccessResponse):
     languages: List[LanguageItem]
 
 
+class FacetsResponse(SuccessResponse):
+    categories: List[GroupedCategory]
+    languages: List[LanguageItem]
+
+
 class BookRequestListResponse(SuccessResponse):
     books: List[BookRequest]
 
@@ -116,6 +132,14 @@ class BookRequestPreviewListResponse(SuccessResponse):
     last_page: int
 
 
+class AcquisitionQueueResponse(SuccessResponse):
+    items: List[AcquisitionItem]
+    total: int
+    page: int
+    has_next: bool
+    last_page: int
+
+
 class BookRequestDetailsResponse(SuccessResponse):
     request: RequestDetails
     requester_count: int
@@ -44,6 +44,13 @@ class UserUpdateRequest(BaseModel):
 class LanguageItem(BaseModel):
     Language: str
     Key: str
+    Count: int = 0
+
+
+class Suggestion(BaseModel):
+    text: str
+    type: str
+    count: int
 
 
 class EmailRequest(BaseModel):
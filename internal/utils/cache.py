@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        # Evict least recently used entries once the cache is full
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def utcnow() -> datetime:
+    # MongoDB TTL indexes expire documents against UTC, and Motor returns naive datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class PersistentTTLCache:
+    def __init__(self, collection, namespace: str, maxsize: int, ttl: float, negative_ttl: float):
+        self.collection = collection
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.counters = {"memory_hits": 0, "store_hits": 0, "negative_hits": 0, "misses": 0}
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        entry = self.memory.get(key, _MISSING)
+        if entry is _MISSING:
+            doc = await self.collection.find_one({
+                "_id": self._key(key),
+                "expires_at": {"$gt": utcnow()},
+            })
+            if not doc:
+                self.counters["misses"] += 1
+                return default
+
+            entry = (doc.get("negative", False), doc.get("value"))
+            remaining = (doc["expires_at"] - utcnow()).total_seconds()
+            self.memory.set(key, entry, ttl=max(remaining, 0))
+            self.counters["store_hits"] += 1
+        else:
+            self.counters["memory_hits"] += 1
+
+        negative, value = entry
+        if negative:
+            self.counters["negative_hits"] += 1
+            return None
+        return value
+
+    async def set(self, key: str, value: Any):
+        await self._store(key, value, negative=False, ttl=self.ttl)
+
+    async def set_missing(self, key: str):
+        await self._store(key, None, negative=True, ttl=self.negative_ttl)
+
+    async def _store(self, key: str, value: Any, negative: bool, ttl: float):
+        self.memory.set(key, (negative, value), ttl=ttl)
+        await self.collection.update_one(
+            {"_id": self._key(key)},
+            {"$set": {
+                "value": value,
+                "negative": negative,
+                "expires_at": utcnow() + timedelta(seconds=ttl),
+            }},
+            upsert=True
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "memory_size": len(self.memory)}
@@ -1,83 +1,24 @@
-import smtplib
 from typing import List
 from urllib.parse import urlencode
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.utils import formatdate, make_msgid, formataddr
-from config.config import LOCAL_IP, get_config
+from config.config import LOCAL_IP
 from internal.models.user import BookPenalty
 from internal.database.books import get_book_by_id
 from internal.tokens.tokens import create_password_reset_token
-from .logger import logger
+from .mail_queue import mail_queue
 
 
 async def send_email_to_user(user, html_body: str, subject: str) -> bool:
-    try:
-        host = get_config("email_host")
-        port = get_config("email_port")
-        username = get_config("email_username")
-        password = get_config("email_password")
-        sender_name = "Library Notifications"
-        sender_email = username
-
-        with smtplib.SMTP(host, port) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(username, password)
-
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = formataddr((sender_name, sender_email))
-            msg["To"] = user.email
-            msg["Date"] = formatdate(localtime=True)
-            msg["Message-ID"] = make_msgid()
-            msg["Reply-To"] = sender_email
-
-            part = MIMEText(html_body, "html", "utf-8")
-            msg.attach(part)
-
-            server.sendmail(sender_email, [user.email], msg.as_string())
-            return True
-
-    except Exception as e:
-        logger.error(f"Failed to send email to {user.email}: {e}")
-        return False
+    # Returns once the email was delivered or given up on
+    return await mail_queue.deliver(user.email, subject, html_body)
 
 
-async def send_email_to_subscribers(user, book, subject):
-    try:
-        host = get_config("email_host")
-        port = get_config("email_port")
-        username = get_config("email_username")
-        password = get_config("email_password")
-        sender_name = "Library Notifications"
-        sender_email = username
-
-        with smtplib.SMTP(host, port) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(username, password)
-
-            user_email = user.email
-            html_body = generate_html_email(book)
-
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = formataddr((sender_name, sender_email))
-            msg["To"] = user_email
-            msg["Date"] = formatdate(localtime=True)
-            msg["Message-ID"] = make_msgid()
-            msg["Reply-To"] = sender_email
-
-            part2 = MIMEText(html_body, "html", "utf-8")
-            msg.attach(part2)
+def queue_email_to_user(user, html_body: str, subject: str) -> bool:
+    # Returns as soon as the email is queued, delivery is not known yet
+    return mail_queue.enqueue(user.email, subject, html_body)
 
-            server.sendmail(sender_email, [user_email], msg.as_string())
-            return True
 
-    except Exception as e:
-        logger.error(f"Failed to send email to {user.email}: {e}")
-        return False
+async def send_email_to_subscribers(user, book, subject):
+    return await mail_queue.deliver(user.email, subject, generate_html_email(book))
 
 
 def generate_html_email(book) -> str:
@@ -191,50 +132,22 @@ async def generate_penalty_email_html_for_book(user, penalty: BookPenalty) -> st
     """
 
 
-async def send_reset_password_email(user, token: str) -> bool:
-    try:
-        host = get_config("email_host")
-        port = get_config("email_port")
-        username = get_config("email_username")
-        password = get_config("email_password")
-        sender_name = "Library Notifications"
-        sender_email = username
-
-        reset_link = f"http://{LOCAL_IP}:8085/reset-password?{urlencode({'token': token})}"
-
-        html_body = f"""
-        <html>
-          <body style="font-family: Arial, sans-serif; color: #333;">
-            <div style="max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px;">
-              <h2 style="color: #2d6a4f;">Password Reset Request</h2>
-              <p>Hi {user.username},</p>
-              <p>We received a request to reset your password.</p>
-              <p>You can reset it by clicking the link below:</p>
-              <a href="{reset_link}" style="display: inline-block; margin-top: 10px; padding: 10px 15px; background-color: #40916c; color: white; text-decoration: none; border-radius: 5px;">Reset Password</a>
-              <p style="margin-top: 20px; font-size: 12px; color: #888;">If you didn't request this, you can safely ignore this email.</p>
-            </div>
-          </body>
-        </html>
-        """
-
-        with smtplib.SMTP(host, port) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(username, password)
-
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = "Reset Your Password"
-            msg["From"] = formataddr((sender_name, sender_email))
-            msg["To"] = user.email
-            msg["Date"] = formatdate(localtime=True)
-            msg["Message-ID"] = make_msgid()
-            msg["Reply-To"] = sender_email
+def queue_reset_password_email(user, token: str) -> bool:
+    reset_link = f"http://{LOCAL_IP}:8085/reset-password?{urlencode({'token': token})}"
 
-            msg.attach(MIMEText(html_body, "html", "utf-8"))
-            server.sendmail(sender_email, [user.email], msg.as_string())
-
-            return True
+    html_body = f"""
+    <html>
+      <body style="font-family: Arial, sans-serif; color: #333;">
+        <div style="max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px;">
+          <h2 style="color: #2d6a4f;">Password Reset Request</h2>
+          <p>Hi {user.username},</p>
+          <p>We received a request to reset your password.</p>
+          <p>You can reset it by clicking the link below:</p>
+          <a href="{reset_link}" style="display: inline-block; margin-top: 10px; padding: 10px 15px; background-color: #40916c; color: white; text-decoration: none; border-radius: 5px;">Reset Password</a>
+          <p style="margin-top: 20px; font-size: 12px; color: #888;">If you didn't request this, you can safely ignore this email.</p>
+        </div>
+      </body>
+    </html>
+    """
 
-    except Exception as e:
-        logger.error(f"Failed to send reset password email to {user.email}: {e}")
-        return False
+    return queue_email_to_user(user, html_body, "Reset Your Password")
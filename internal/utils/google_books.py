@@ -1,71 +1,153 @@
-import requests
+import asyncio
+import httpx
 from typing import Any, Dict, List, Optional
-from urllib.parse import quote_plus
 from internal.models.book import Book, BookCategory
 from datetime import datetime
+from config.config import get_config
+from internal.database.database import google_books_cache_collection
+from .cache import PersistentTTLCache
 from .logger import logger
 
 
-GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
+GOOGLE_BOOKS_API_URL = get_config("google_books_api_url")
 SEARCH_FIELDS = ["isbn", "intitle", "inauthor", "inpublisher"]
+CACHE_MEMORY_SIZE = 1024
+
+_UNCACHED = object()
+
+# Raw API payloads are cached, Book objects are built fresh on every lookup
+search_cache = PersistentTTLCache(
+    google_books_cache_collection, "search", maxsize=CACHE_MEMORY_SIZE,
+    ttl=get_config("google_books_cache_ttl"), negative_ttl=get_config("google_books_negative_cache_ttl")
+)
+volume_cache = PersistentTTLCache(
+    google_books_cache_collection, "volume", maxsize=CACHE_MEMORY_SIZE,
+    ttl=get_config("google_books_cache_ttl"), negative_ttl=get_config("google_books_negative_cache_ttl")
+)
+
+_client: Optional[httpx.AsyncClient] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        max_connections = get_config("google_books_max_connections")
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(get_config("google_books_timeout")),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+    return _client
+
+
+async def close_google_books_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _get_json(url: str, params: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    host = httpx.URL(url).host
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(get_config("google_books_max_connections"))
+
+    async with _host_limits[host]:
+        response = await _get_client().get(url, params=params)
+
+    # Only a 404 is a real miss worth caching. Quota and key errors (403),
+    # bad requests, throttling and server errors raise so nothing is cached.
+    if response.status_code == 404:
+        logger.error(f"Google Books request failed | url={url} | params={params} | status code {response.status_code}")
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+async def _search_field(field: str, query: str) -> Optional[List[Dict[str, Any]]]:
+    try:
+        data = await _get_json(GOOGLE_BOOKS_API_URL, params={"q": f"{field}:{query}"})
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to search the book | query={query} | field={field} | {e}")
+        return None
 
+    if not data:
+        return []
 
-def search_google_books(query: str) -> List[Dict[str, Any]]:
-    encoded_query = quote_plus(query)
-
-    for field in SEARCH_FIELDS:
-        search_term = f"{field}:{encoded_query}"
-        params = {"q": search_term}
-        try:
-            response = requests.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
-            if response.status_code != 200:
-                logger.error(f"Failed to search the book | query={query} | status code {response.status_code}")
-                continue
-
-            data = response.json()
-            items = data.get("items")
-            if not items:
-                continue
-
-            results = []
-            for item in items:
-                volume_id = item.get("id")
-                info = item.get("volumeInfo", {})
-                title = info.get("title")
-                authors = info.get("authors", [])
-                categories = info.get("categories", [])
-                publisher = info.get("publisher")
-                image_links = info.get("imageLinks", {})
-                cover_image = image_links.get("thumbnail") or image_links.get("smallThumbnail")
-                isbn = _extract_isbn(info.get("industryIdentifiers", []))
-
-                if volume_id and title:
-                    results.append({
-                        "id": volume_id,
-                        "title": title,
-                        "authors": authors,
-                        "categories": categories,
-                        "publisher": publisher,
-                        "cover_image": cover_image,
-                        "isbn": isbn
-                    })
+    results = []
+    for item in data.get("items") or []:
+        volume_id = item.get("id")
+        info = item.get("volumeInfo", {})
+        title = info.get("title")
+        image_links = info.get("imageLinks", {})
+
+        if volume_id and title:
+            results.append({
+                "id": volume_id,
+                "title": title,
+                "authors": info.get("authors", []),
+                "categories": info.get("categories", []),
+                "publisher": info.get("publisher"),
+                "cover_image": image_links.get("thumbnail") or image_links.get("smallThumbnail"),
+                "isbn": _extract_isbn(info.get("industryIdentifiers", []))
+            })
+    return results
+
+
+async def _search_all_fields(query: str) -> Optional[List[Dict[str, Any]]]:
+    # All field prefixes are queried at once, but results keep the field priority
+    tasks = [asyncio.create_task(_search_field(field, query)) for field in SEARCH_FIELDS]
+    failed = False
+    try:
+        for task in tasks:
+            results = await task
             if results:
                 return results
-        except requests.RequestException:
-            continue
+            failed = failed or results is None
+        return None if failed else []
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    return []
 
+async def search_google_books(query: str) -> List[Dict[str, Any]]:
+    key = " ".join(query.lower().split())
+    cached = await search_cache.get(key, _UNCACHED)
+    if cached is not _UNCACHED:
+        return cached or []
+
+    results = await _search_all_fields(query)
+    if results is None:
+        return []
 
-def fetch_google_book(volume_id: str) -> Optional[Book]:
-    url = f"{GOOGLE_BOOKS_API_URL}/{volume_id}"
-    response = requests.get(url, timeout=10)
-    if response.status_code != 200:
-        logger.error(f"Failed to get book information | id={volume_id} | status code {response.status_code}")
+    if results:
+        await search_cache.set(key, results)
+    else:
+        await search_cache.set_missing(key)
+    return results
+
+
+async def _fetch_volume_info(volume_id: str) -> Optional[Dict[str, Any]]:
+    cached = await volume_cache.get(volume_id, _UNCACHED)
+    if cached is not _UNCACHED:
+        return cached
+
+    try:
+        data = await _get_json(f"{GOOGLE_BOOKS_API_URL}/{volume_id}")
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to get book information | id={volume_id} | {e}")
         return None
 
-    data = response.json()
-    info = data.get("volumeInfo")
+    info = data.get("volumeInfo") if data else None
+    if info:
+        await volume_cache.set(volume_id, info)
+    else:
+        await volume_cache.set_missing(volume_id)
+    return info
+
+
+async def fetch_google_book(volume_id: str) -> Optional[Book]:
+    info = await _fetch_volume_info(volume_id)
     if not info:
         return None
 
@@ -91,6 +173,10 @@ def fetch_google_book(volume_id: str) -> Optional[Book]:
     )
 
 
+def google_books_cache_metrics() -> Dict[str, Dict[str, int]]:
+    return {"search": search_cache.stats(), "volume": volume_cache.stats()}
+
+
 def _extract_isbn(identifiers: List[Dict[str, str]]) -> Optional[str]:
     for ident in identifiers:
         if ident.get("type") == "ISBN_13":
@@ -0,0 +1,227 @@
+import asyncio
+import smtplib
+import time
+from typing import Any, Dict, List, Optional
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from email.utils import formatdate, make_msgid, formataddr
+from config.config import get_config
+from .logger import logger
+
+SENDER_NAME = "Library Notifications"
+RETRY_BASE_DELAY = 2
+
+
+def is_transient_error(error: Exception) -> bool:
+    # 4xx replies and dropped connections may succeed later, 5xx replies will not
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+class OutboundEmail:
+    def __init__(self, recipient: str, subject: str, html_body: str, delivered: Optional[asyncio.Future] = None):
+        self.recipient = recipient
+        self.subject = subject
+        self.html_body = html_body
+        # Resolved with True once the server accepted the email, False once it was given up on
+        self.delivered = delivered
+        self.attempts = 0
+
+    def settle(self, sent: bool):
+        if self.delivered is not None and not self.delivered.done():
+            self.delivered.set_result(sent)
+
+    def as_string(self, sender_email: str) -> str:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = self.subject
+        msg["From"] = formataddr((SENDER_NAME, sender_email))
+        msg["To"] = self.recipient
+        msg["Date"] = formatdate(localtime=True)
+        msg["Message-ID"] = make_msgid()
+        msg["Reply-To"] = sender_email
+        msg.attach(MIMEText(self.html_body, "html", "utf-8"))
+        return msg.as_string()
+
+
+# Authenticated SMTP session reused by a single worker
+class SMTPConnection:
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        server = smtplib.SMTP(get_config("email_host"), get_config("email_port"), timeout=get_config("email_timeout"))
+        server.ehlo()
+        server.starttls()
+        server.login(get_config("email_username"), get_config("email_password"))
+        self._server = server
+
+    def _ensure_alive(self):
+        if self._server is None:
+            self._connect()
+            return
+
+        # Probe connections that sat idle, the server may have dropped them
+        if time.monotonic() - self._last_used > get_config("email_keepalive_seconds"):
+            try:
+                self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+                self._connect()
+
+    def send(self, sender_email: str, email: OutboundEmail):
+        self._ensure_alive()
+        try:
+            self._server.sendmail(sender_email, [email.recipient], email.as_string(sender_email))
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            self._connect()
+            self._server.sendmail(sender_email, [email.recipient], email.as_string(sender_email))
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
+
+
+class MailQueue:
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Backoff timers of emails waiting to be retried, keyed by the email object
+        self._retries: Dict[OutboundEmail, asyncio.TimerHandle] = {}
+        self._stopping = False
+        self._counters = {"enqueued": 0, "sent": 0, "retried": 0, "failed": 0, "rejected": 0}
+
+    async def start(self):
+        if self._workers:
+            return
+
+        self._stopping = False
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=get_config("email_queue_size"))
+        for index in range(get_config("email_workers")):
+            self._workers.append(asyncio.create_task(self._worker(index)))
+
+    async def stop(self, timeout: float = 10):
+        if not self._workers:
+            return
+
+        # Emails backing off are sent now rather than lost with the process
+        self._stopping = True
+        for email, handle in list(self._retries.items()):
+            handle.cancel()
+            self._requeue(email)
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Mail queue stopped with {self._queue.qsize()} emails still pending")
+
+        for email, handle in self._retries.items():
+            handle.cancel()
+            email.settle(False)
+        if self._retries:
+            self._counters["failed"] += len(self._retries)
+            logger.warning(f"Mail queue stopped with {len(self._retries)} retries abandoned")
+            self._retries.clear()
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # Callers still waiting on emails that never went out are released
+        while not self._queue.empty():
+            self._queue.get_nowait().settle(False)
+            self._queue.task_done()
+
+    def _put(self, email: OutboundEmail) -> bool:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=get_config("email_queue_size"))
+
+        try:
+            self._queue.put_nowait(email)
+        except asyncio.QueueFull:
+            self._counters["rejected"] += 1
+            logger.error(f"Mail queue is full, dropping email to {email.recipient}")
+            return False
+
+        self._counters["enqueued"] += 1
+        return True
+
+    def enqueue(self, recipient: str, subject: str, html_body: str) -> bool:
+        # True only means the email was queued, delivery happens later
+        return self._put(OutboundEmail(recipient, subject, html_body))
+
+    async def deliver(self, recipient: str, subject: str, html_body: str) -> bool:
+        # Waits through retries, True means the server accepted the email
+        delivered = asyncio.get_running_loop().create_future()
+        if not self._put(OutboundEmail(recipient, subject, html_body, delivered)):
+            return False
+        return await delivered
+
+    def _requeue(self, email: OutboundEmail):
+        self._retries.pop(email, None)
+        try:
+            self._queue.put_nowait(email)
+        except asyncio.QueueFull:
+            self._counters["failed"] += 1
+            email.settle(False)
+            logger.error(f"Mail queue is full, giving up on email to {email.recipient}")
+
+    async def _worker(self, index: int):
+        connection = SMTPConnection()
+        sender_email = get_config("email_username")
+        loop = asyncio.get_running_loop()
+
+        try:
+            while True:
+                email = await self._queue.get()
+                try:
+                    # smtplib is blocking, so the session lives on a worker thread
+                    await asyncio.to_thread(connection.send, sender_email, email)
+                    self._counters["sent"] += 1
+                    email.settle(True)
+                except asyncio.CancelledError:
+                    email.settle(False)
+                    raise
+                except Exception as e:
+                    await asyncio.to_thread(connection.close)
+                    email.attempts += 1
+                    if not is_transient_error(e) or email.attempts > get_config("email_max_retries"):
+                        self._counters["failed"] += 1
+                        email.settle(False)
+                        logger.error(f"Failed to send email to {email.recipient}: {e}")
+                    elif self._stopping:
+                        # Shutting down, there is no time left to back off
+                        self._counters["retried"] += 1
+                        self._requeue(email)
+                    else:
+                        self._counters["retried"] += 1
+                        delay = RETRY_BASE_DELAY ** email.attempts
+                        logger.warning(f"Retrying email to {email.recipient} in {delay}s (worker {index}): {e}")
+                        self._retries[email] = loop.call_later(delay, self._requeue, email)
+                finally:
+                    self._queue.task_done()
+        finally:
+            await asyncio.to_thread(connection.close)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending_retries": len(self._retries),
+            "workers": len(self._workers),
+        }
+
+
+mail_queue = MailQueue()
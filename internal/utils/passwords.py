@@ -0,0 +1,69 @@
+import asyncio
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from config.config import get_config
+
+
+# bcrypt releases the GIL while hashing, so a thread pool keeps the event loop free
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._counters = {"hashed": 0, "verified": 0, "rejected": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._in_flight -= 1
+
+    def hash_sync(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=self.rounds)).decode()
+
+    @staticmethod
+    def verify_sync(password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(self.hash_sync, password)
+        self._counters["hashed"] += 1
+        return hashed
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        valid = await self._run(self.verify_sync, password, hashed)
+        self._counters["verified" if valid else "rejected"] += 1
+        return valid
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "in_flight": self._in_flight,
+            "queue_depth": max(self._in_flight - self.workers, 0),
+            "workers": self.workers,
+            "rounds": self.rounds,
+        }
+
+
+password_hasher = PasswordHasher(get_config("bcrypt_rounds"), get_config("password_workers"))
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.verify(password, hashed)
@@ -1,17 +1,15 @@
-import bcrypt
+import time
 from jose import jwt
 from fastapi import Request
+from typing import Any, Dict
 from config.config import get_config
-from internal.database.users import get_user_by_id
-from internal.database.admins import get_admin_by_id
+from internal.database.users import get_user_by_id, get_user_principal
+from internal.database.admins import get_cached_admin_by_id, get_admin_principal
 from internal.database.books import get_book_by_isbn
 from internal.types.exceptions import FailResponseException
+from .cache import TTLCache
 
-
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode(), salt)
-    return hashed_password.decode()
+_token_cache = TTLCache(maxsize=get_config("auth_cache_size"), ttl=get_config("auth_cache_ttl"))
 
 
 def verify_token_owner(request: Request, model, token_name: str) -> bool:
@@ -26,17 +24,26 @@ def verify_token_owner(request: Request, model, token_name: str) -> bool:
         return False
 
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    payload = _token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, get_config("secret_key"), algorithms=[get_config("algorithm")])
+
+        # A cached payload must never outlive the token itself
+        ttl = get_config("auth_cache_ttl")
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        _token_cache.set(token, payload, ttl=ttl)
+    return payload
+
+
 async def get_current_user(request: Request):
     access_token = request.cookies.get("access_token")
     if not access_token:
         raise FailResponseException(401, "You must be logged in to continue.")
 
     try:
-        payload = jwt.decode(
-            access_token,
-            get_config("secret_key"),
-            algorithms=[get_config("algorithm")]
-        )
+        payload = decode_access_token(access_token)
         user_id = payload.get("id")
         if not user_id:
             raise FailResponseException(401, "Authentication token is invalid or corrupted.")
@@ -53,6 +60,29 @@ async def get_current_user(request: Request):
         raise FailResponseException(401, "Authentication token could not be verified.")
 
 
+async def get_current_user_principal(request: Request):
+    access_token = request.cookies.get("access_token")
+    if not access_token:
+        raise FailResponseException(401, "You must be logged in to continue.")
+
+    try:
+        payload = decode_access_token(access_token)
+        user_id = payload.get("id")
+        if not user_id:
+            raise FailResponseException(401, "Authentication token is invalid or corrupted.")
+
+        principal = await get_user_principal(user_id)
+        if not principal:
+            raise FailResponseException(404, "User account not found. Please contact support.")
+
+        return principal
+
+    except jwt.ExpiredSignatureError:
+        raise FailResponseException(401, "Your session has expired. Please log in again.")
+    except jwt.JWTError:
+        raise FailResponseException(401, "Authentication token could not be verified.")
+
+
 async def get_scanned_book(request: Request):
     token = request.cookies.get("scanned_book")
     if not token:
@@ -88,17 +118,13 @@ async def get_current_admin(request: Request):
         raise FailResponseException(401, "You must be logged in as an admin to continue.")
 
     try:
-        payload = jwt.decode(
-            access_token,
-            get_config("secret_key"),
-            algorithms=[get_config("algorithm")]
-        )
+        payload = decode_access_token(access_token)
         admin_id = payload.get("id")
         role = payload.get("role")
         if not admin_id or role != "admin":
             raise FailResponseException(401, "Authentication token is invalid or does not belong to an admin.")
 
-        admin = await get_admin_by_id(admin_id)
+        admin = await get_cached_admin_by_id(admin_id)
         if not admin:
             raise FailResponseException(404, "Admin account not found. Please contact support.")
 
@@ -109,3 +135,31 @@ async def get_current_admin(request: Request):
     except jwt.JWTError:
         raise FailResponseException(401, "Authentication token could not be verified.")
 
+
+async def get_current_admin_principal(request: Request):
+    access_token = request.cookies.get("access_token")
+    if not access_token:
+        raise FailResponseException(401, "You must be logged in as an admin to continue.")
+
+    try:
+        payload = decode_access_token(access_token)
+        admin_id = payload.get("id")
+        role = payload.get("role")
+        if not admin_id or role != "admin":
+            raise FailResponseException(401, "Authentication token is invalid or does not belong to an admin.")
+
+        principal = await get_admin_principal(admin_id)
+        if not principal:
+            raise FailResponseException(404, "Admin account not found. Please contact support.")
+
+        return principal
+
+    except jwt.ExpiredSignatureError:
+        raise FailResponseException(401, "Your session has expired. Please log in again.")
+    except jwt.JWTError:
+        raise FailResponseException(401, "Authentication token could not be verified.")
+
+
+def auth_cache_metrics() -> Dict[str, int]:
+    return _token_cache.stats()
+
@@ -7,8 +7,20 @@ from contextlib import asynccontextmanager
 from config.config import get_config, set_config, LOCAL_IP
 from internal.utils.logger import logger
 from internal.database.database import check_connection, client
+from internal.database.indexes import ensure_indexes
+from internal.database.migrations import run_migrations
+from internal.search.book_index import build_book_index
+from internal.search.user_index import build_user_index
+from internal.database.related_books import count_related_rows
+from internal.jobs.related_books import load_borrow_histories, schedule_full_related_refresh
+from internal.utils.mail_queue import mail_queue
+from internal.utils.google_books import close_google_books_client
+from internal.utils.passwords import password_hasher
+from internal.jobs.book_import import resume_interrupted_book_imports
+from internal.jobs.user_cleanup import resume_interrupted_hard_ban_cleanups
 from internal.api.utils.exception_handlers import generic_exception_handler, validation_exception_handler
-from internal.cron_jobs.penalty_handler import start_cron_jobs, check_penalties
+from internal.cron_jobs.penalty_handler import check_penalties
+from internal.cron_jobs.scheduler import start_cron_jobs
 from internal.api.auth import login, token
 from internal.api.book import books, google_books, request_book, user_book_operations
 from internal.api.user import user, reset_password
@@ -27,11 +39,41 @@ async def lifespan(app: FastAPI):
         await check_connection()
         logger.info("Successfully connected to the database.")
 
+        index_report = await ensure_indexes()
+        if index_report["missing"] or index_report["different"]:
+            logger.warning("Database indexes are not fully provisioned, see the warnings above.")
+        else:
+            logger.info("Successfully verified the database indexes.")
+
+        await run_migrations()
+
+        indexed_count = await build_book_index()
+        logger.info(f"Successfully built the book search index ({indexed_count} books).")
+
+        indexed_users = await build_user_index()
+        logger.info(f"Successfully built the user search index ({indexed_users} users).")
+
+        await load_borrow_histories()
+        if await count_related_rows() == 0:
+            schedule_full_related_refresh()
+            logger.info("Related books table is empty, rebuilding it in the background.")
+
         start_cron_jobs()
         logger.info("Successfully started the cron jobs.")
 
+        await mail_queue.start()
+        logger.info("Successfully started the mail queue workers.")
+
         await check_penalties()
         logger.info("Successfully checked penalties.")
+
+        resumed_imports = await resume_interrupted_book_imports()
+        if resumed_imports:
+            logger.info(f"Resumed {resumed_imports} interrupted book imports.")
+
+        resumed_cleanups = await resume_interrupted_hard_ban_cleanups()
+        if resumed_cleanups:
+            logger.info(f"Resumed {resumed_cleanups} interrupted hard-ban cleanups.")
     except Exception as e:
         logger.error(f"Failed to connect to the database. Details: {e}")
         sys.exit(1)
@@ -40,6 +82,12 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown
+    await mail_queue.stop()
+    logger.info("Mail queue drained and stopped.")
+
+    await close_google_books_client()
+    password_hasher.shutdown()
+
     client.close()
     logger.info("Database connection closed.")
 